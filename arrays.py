@@ -0,0 +1,95 @@
+### Array versions of the numeric functions in utils.py, for whole populations
+### at once. Each takes NumPy arrays (or anything np.asarray() accepts) and
+### works elementwise, with broadcasting, or row by row, and gives the same
+### results as the function it stands for, element by element (up to rounding
+### for the choice probabilities, which are computed more stably here).
+
+import numpy as np
+
+def wrapped_diffs(d, wrap):
+    '''The shortest absolute differences d between coordinates on a circle of size wrap,
+    as get_point_dist() finds them; d is unchanged if wrap is 0.'''
+    if not wrap:
+        return d
+    d = np.abs(d)
+    return np.minimum(d, np.abs(wrap - d))
+
+def point_dists(x1, y1, x2, y2, wrap_x=0, wrap_y=0):
+    '''Array of the integer distances get_point_dist() gives for points x1, y1 and x2, y2.
+    For a matrix of distances between all pairs of points in xs, ys, use
+    point_dists(xs[:, None], ys[:, None], xs, ys, ...).'''
+    xdiff = wrapped_diffs(np.asarray(x1) - np.asarray(x2), wrap_x)
+    ydiff = wrapped_diffs(np.asarray(y1) - np.asarray(y2), wrap_y)
+    return np.sqrt(xdiff * xdiff + ydiff * ydiff).astype(np.int64)
+
+def wrapped_offsets(d, wrap):
+    '''Offsets d changed, as get_point_angle() does, to the shorter way around a circle
+    of size wrap, when there is one.'''
+    if not wrap:
+        return d
+    plus = d + wrap
+    minus = d - wrap
+    return np.where(np.abs(plus) < np.abs(d), plus, np.where(np.abs(minus) < np.abs(d), minus, d))
+
+def point_angles(x1, y1, x2, y2, wrap_x=0, wrap_y=0):
+    '''Array of the angles in integer degrees get_point_angle() gives for points x1, y1
+    and x2, y2.'''
+    xdiff = wrapped_offsets(np.asarray(x2) - np.asarray(x1), wrap_x)
+    ydiff = wrapped_offsets(np.asarray(y1) - np.asarray(y2), wrap_y)
+    xdiff, ydiff = np.broadcast_arrays(xdiff, ydiff)
+    zero = xdiff == 0
+    tang = np.where(zero, 1000.0, ydiff / np.where(zero, 1, xdiff))
+    ang = np.round(np.degrees(np.arctan(tang)))
+    ang = np.where((xdiff < 0) | (ydiff < 0), ang + 180, ang)
+    return np.where(ang < 0, ang + 360, ang).astype(np.int64)
+
+def luce_probabilities(values, mult=1.0):
+    '''The probabilities exp_luce_choice() gives each value in each row of values.
+    The largest value in each row is subtracted before exponentiating, so the
+    probabilities stay finite however large mult * values get.'''
+    scaled = np.asarray(values, dtype=float) * mult
+    exps = np.exp(scaled - scaled.max(axis=-1, keepdims=True))
+    return exps / exps.sum(axis=-1, keepdims=True)
+
+def luce_choices(values, mult=1.0, randoms=None):
+    '''Array of the indices chosen, as exp_luce_choice() chooses them, in each row of values,
+    given an array of random numbers in [0, 1), one per row (drawn here if not given).'''
+    probabilities = luce_probabilities(values, mult)
+    if randoms is None:
+        randoms = np.random.random(probabilities.shape[:-1])
+    # The first index where the running total passes the random number
+    totals = np.cumsum(probabilities, axis=-1)
+    chosen = (totals <= np.asarray(randoms)[..., None]).sum(axis=-1)
+    # In case of rounding errors, as in exp_luce_choice()
+    return np.minimum(chosen, probabilities.shape[-1] - 1)
+
+def dot_products(v1, v2):
+    '''Array of the dot products of the rows of v1 and v2.'''
+    return np.einsum('...i,...i->...', np.asarray(v1, dtype=float), np.asarray(v2, dtype=float))
+
+def normalized(vectors):
+    '''A copy of vectors with every row made length 1.0.'''
+    vectors = np.asarray(vectors, dtype=float)
+    return vectors / np.sqrt((vectors * vectors).sum(axis=-1, keepdims=True))
+
+def sigmoids(inp, thresh, gain):
+    '''Array of sigmoid() of each of inp.'''
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(gain * (thresh - np.asarray(inp, dtype=float))))
+
+def sigmoid_slopes(x):
+    '''Array of sigmoid_slope() of each of x.'''
+    return x * (1.0 - x)
+
+def bins_to_decs(bits):
+    '''Array of the numbers that bin_to_dec() gives for each row of bits, first bit highest.'''
+    bits = np.asarray(bits, dtype=np.int64)
+    return bits @ (1 << np.arange(bits.shape[-1] - 1, -1, -1))
+
+def bit_group_values(packed, n_bits, group):
+    '''Array of the values of the groups of group bits in the first n_bits bits of each
+    row of packed (bytes with the bits packed eight to a byte, first bit highest), with a
+    row of n_bits // group values for each row of packed.'''
+    packed = np.asarray(packed, dtype=np.uint8)
+    bits = np.unpackbits(packed, axis=-1)[..., :n_bits]
+    return bins_to_decs(bits.reshape(bits.shape[:-1] + (n_bits // group, group)))
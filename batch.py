@@ -0,0 +1,135 @@
+### Running many independent worlds at once, headless, in a pool of processes.
+### Each world gets its own configuration: a seed, the numbers of each type of
+### entity, the evolution and learning parameters, and a number of steps.
+### The statistics for every world come back as plain dicts.
+
+import argparse, json, random
+from concurrent.futures import ProcessPoolExecutor
+from world import *
+from telemetry import Telemetry
+from profiler import Profiler
+
+ENTITY_TYPES = {typ.__name__: typ for typ in (Clod, Fog, Plasmoid, Diskoid, Ringoid)}
+"""The types of entity a config can name, indexed by name."""
+
+def default_config():
+    '''Configuration for a world, taking the evolution and learning parameters
+    from the current settings in this process.'''
+    return {'seed': None,
+            # Dict like World.ENTITIES; keys may be types or their names
+            'entities': None,
+            'width': 450,
+            'height': 450,
+            'evolve': Genome.evolve,
+            'mutation': Genome.MUTATION,
+            'crossover': Genome.CROSSOVER,
+            'eta': Network.eta,
+            # Whether QLearners learn from replay buffers, and whether species share them
+            'replay': QLearner.replay,
+            'replay_shared': QLearner.REPLAY_SHARED,
+            'steps': World.STEPS_PER_RUN,
+            # If not None, a telemetry file path, which may contain {seed}
+            'telemetry': None,
+            'telemetry_every': Telemetry.EVERY,
+            # Whether to include a profile of the steps in the results
+            'profile': False}
+
+def complete_config(config):
+    '''A copy of config with defaults filled in, and a seed drawn if there isn't one.'''
+    config = dict(default_config(), **config)
+    if config['seed'] is None:
+        config['seed'] = random.SystemRandom().randrange(2 ** 32)
+    return config
+
+def entity_types(entities):
+    '''A copy of an ENTITIES-like dict with type names replaced by the types.
+    Raises ValueError for a name that isn't in ENTITY_TYPES.'''
+    if not entities:
+        return None
+    types = {}
+    for typ, counts in entities.items():
+        if isinstance(typ, str):
+            if typ not in ENTITY_TYPES:
+                raise ValueError('unknown entity type %r; the types are %s' %
+                                 (typ, ', '.join(ENTITY_TYPES)))
+            typ = ENTITY_TYPES[typ]
+        types[typ] = counts
+    return types
+
+def entity_names(entities):
+    '''A copy of an ENTITIES-like dict with types replaced by their names.'''
+    return {(typ if isinstance(typ, str) else typ.__name__): counts \
+            for typ, counts in (entities or World.ENTITIES).items()}
+
+def make_world(config):
+    '''Set the parameters config gives (after filling in defaults), and create a
+    world with the seed it gives.'''
+    Genome.evolve = config['evolve']
+    Genome.MUTATION = config['mutation']
+    Genome.CROSSOVER = config['crossover']
+    Network.eta = config['eta']
+    QLearner.replay = config['replay']
+    QLearner.REPLAY_SHARED = config['replay_shared']
+    return World(config['width'], config['height'], entities=entity_types(config['entities']),
+                 seed=config['seed'])
+
+def run_world(config):
+    '''Run one world as config says, returning its statistics along with the config.'''
+    config = complete_config(config)
+    world = make_world(config)
+    telemetry = None
+    if config['telemetry']:
+        telemetry = Telemetry(world, config['telemetry'].format(seed=config['seed']),
+                              config['telemetry_every'])
+    profiler = Profiler().attach(world) if config['profile'] else None
+    for s in range(config['steps']):
+        world.step()
+    if telemetry:
+        telemetry.close()
+    config['entities'] = entity_names(config['entities'])
+    results = {'config': config, 'steps': world.steps, 'stats': world.get_stats()}
+    if profiler:
+        results['profile'] = profiler.report()
+    return results
+
+def run_worlds(configs, max_workers=None):
+    '''Run a world for each of configs in a pool of max_workers processes.
+    Returns the results of run_world() in the same order as configs.'''
+    # Fill in the defaults here, so that settings made in this process carry over
+    configs = [complete_config(config) for config in configs]
+    with ProcessPoolExecutor(max_workers) as pool:
+        return list(pool.map(run_world, configs))
+
+def replicates(config, n, first_seed=0):
+    '''n copies of config, with seeds first_seed, first_seed + 1, ...'''
+    return [dict(config, seed=first_seed + i) for i in range(n)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run replicate worlds in parallel.')
+    parser.add_argument('--replicates', type=int, default=4)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--steps', type=int, default=World.STEPS_PER_RUN)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--eta', type=float, default=0.05)
+    parser.add_argument('--mutation', type=float, default=Genome.MUTATION)
+    parser.add_argument('--crossover', type=float, default=Genome.CROSSOVER)
+    parser.add_argument('--replay', choices=['learner', 'species'], default=None,
+                        help='learn from replay buffers, one per learner or per species')
+    parser.add_argument('--entities', type=json.loads, default=None,
+                        help='JSON dict like World.ENTITIES, keyed by type name')
+    parser.add_argument('--telemetry', default=None,
+                        help='telemetry file for each world, like run-{seed}.tel')
+    parser.add_argument('--telemetry-every', type=int, default=Telemetry.EVERY)
+    parser.add_argument('--profile', action='store_true', help='include a profile of the steps')
+    args = parser.parse_args()
+    try:
+        entity_types(args.entities)
+    except ValueError as e:
+        parser.error(str(e))
+    config = {'steps': args.steps, 'eta': args.eta, 'evolve': True,
+              'mutation': args.mutation, 'crossover': args.crossover,
+              'replay': bool(args.replay), 'replay_shared': args.replay == 'species',
+              'entities': args.entities, 'telemetry': args.telemetry,
+              'telemetry_every': args.telemetry_every, 'profile': args.profile}
+    results = run_worlds(replicates(config, args.replicates, args.first_seed), args.workers)
+    print(json.dumps(results, indent=1))
@@ -0,0 +1,359 @@
+### Micro-benchmarks for the parts of the simulation that run most often,
+### each at a few sizes. Results are printed and can be saved as JSON, and a
+### saved run can be given to compare against.
+###
+###   python bench.py --output before.json
+###   python bench.py --compare before.json --filter genome
+
+import argparse, json, math, platform, random, sys, time
+import numpy as np
+from world import *
+
+REPEAT = 5
+"""Number of timings of each benchmark; the best one is reported."""
+MIN_TIME = 0.05
+"""Each timing runs the benchmark enough times to take at least this many seconds."""
+
+def seed(n=0):
+    '''Seed the random module, which new worlds draw their seeds from, so every
+    benchmark sees the same world.'''
+    random.seed(n)
+
+def make_world(n, ringoids=0.1, clods=0.0):
+    '''A world with about n orgs, mostly Plasmoids, with a fixed density of entities.'''
+    side = int(math.sqrt(n * 450 * 450 / 110))
+    entities = {Ringoid: {'init': int(n * ringoids), 'min': 0, 'max': n},
+                Diskoid: {'init': int(n * ringoids), 'min': 0, 'max': n},
+                Plasmoid: {'init': n - 2 * int(n * ringoids), 'min': 0, 'max': n}}
+    if clods:
+        entities[Clod] = {'init': int(n * clods), 'min': 0, 'max': n}
+    return World(side, side, entities=entities)
+
+## The benchmarks: each takes a size and returns a function to time
+
+def world_step(n):
+    '''World.step() with n orgs, with evolution and learning on.'''
+    seed()
+    Genome.evolve = True
+    Network.eta = 0.05
+    world = make_world(n)
+    # Keep the population steady
+    for typ, counts in world.populations.items():
+        counts['min'] = counts['init']
+    return world.step
+
+def world_placement(n):
+    '''World.get_entities_coords() for n new entities in a world with Clods.'''
+    seed()
+    world = make_world(440, clods=0.1)
+    return lambda: world.get_entities_coords(n)
+
+def critter_move(n):
+    '''Critter.move() for every critter in a world with n orgs and Clods, turning
+    each one around after it moves so that they stay where they are.'''
+    seed()
+    world = make_world(n, clods=0.1)
+    critters = [e for e in world.entities.values() if isinstance(e, Critter)]
+    def run():
+        for critter in critters:
+            critter.move()
+            critter.heading = (critter.heading + 180) % 360
+    return run
+
+def find_mates(n):
+    '''World.find_mates() in a world of n orgs, a quarter of them Diskoids.'''
+    seed()
+    world = make_world(n, ringoids=0.25)
+    return world.find_mates
+
+def sense_symbolic(n):
+    '''Feel.sense_symbolic() for every Ringoid in a world with n orgs.'''
+    seed()
+    world = make_world(n)
+    sensors = [e.sensor for e in world.entities.values() if isinstance(e, Ringoid)]
+    def run():
+        for sensor in sensors:
+            sensor.sense_symbolic()
+    return run
+
+def ringoid_states(n):
+    '''n feature lists sensed by Ringoids, and a Ringoid sensor.'''
+    seed()
+    world = make_world(110)
+    sensor = [e.sensor for e in world.entities.values() if isinstance(e, Ringoid)][0]
+    labels = sensor.features + ['none']
+    states = [[sensor.feature_label(random.choice(labels), i) \
+               for i in range(len(sensor.feeler_specs))] for j in range(n)]
+    return sensor, states
+
+def symbolic2index(n):
+    '''Feel.symbolic2index() on n states.'''
+    sensor, states = ringoid_states(n)
+    def run():
+        for state in states:
+            sensor.symbolic2index(state)
+    return run
+
+def symbolic2binary(n):
+    '''Feel.symbolic2binary() on n states.'''
+    sensor, states = ringoid_states(n)
+    def run():
+        for state in states:
+            sensor.symbolic2binary(state)
+    return run
+
+def make_genomes(n_states, n=2):
+    '''n initialized genomes for n_states states and 4 actions, and an animal for them.'''
+    seed()
+    world = make_world(110)
+    animal = [e for e in world.entities.values() if isinstance(e, Diskoid)][0]
+    genomes = []
+    for i in range(n):
+        genome = Genome(animal, n_states, 4)
+        genome.initialize()
+        genomes.append(genome)
+    return animal, genomes
+
+def genome_crossover(n_states):
+    '''Genome.crossover() for genomes for n_states states, with evolution on.'''
+    Genome.evolve = True
+    animal, (genome1, genome2) = make_genomes(n_states)
+    # The offspring genomes all go to the same animal
+    return lambda: genome1.crossover(genome2, animal, animal)
+
+def genome_mutate(n_states):
+    '''Genome.mutate() for a genome for n_states states.'''
+    animal, (genome, other) = make_genomes(n_states)
+    return genome.mutate
+
+def genome_best_action(n_states):
+    '''Genome.get_best_action() for every state, after the genome has changed.'''
+    animal, (genome, other) = make_genomes(n_states)
+    states = list(range(n_states))
+    def run():
+        genome.invalidate()
+        for state in states:
+            genome.get_best_action(state)
+    return run
+
+def make_network(n_inputs):
+    '''A two-layer network like a Ringoid's brain with n_inputs inputs, and a pattern.'''
+    seed()
+    network = Network('bench', [Layer('in', n_inputs),
+                                Layer('out', 4, weight_range=0.5, linear=True)])
+    pattern = [random.randint(0, 1) for i in range(n_inputs)]
+    return network, pattern
+
+def network_run(n_inputs):
+    '''Network.run() without a target.'''
+    network, pattern = make_network(n_inputs)
+    return lambda: network.run(pattern)
+
+def network_train(n_inputs):
+    '''Network.run() with a target for one output, as QLearner uses it.'''
+    # Small enough to keep training on the same pattern from diverging
+    Network.eta = 0.5 / n_inputs
+    network, pattern = make_network(n_inputs)
+    target = ['x', 1.0, 'x', 'x']
+    return lambda: network.run(pattern, target)
+
+def network_train_batch(n_inputs):
+    '''Network.train_batch() for one pass over 256 patterns.'''
+    network, pattern = make_network(n_inputs)
+    patterns = [[random.randint(0, 1) for i in range(n_inputs)] for j in range(256)]
+    targets = [['x', 1.0, 'x', 'x']] * 256
+    return lambda: network.train_batch(patterns, targets, eta=0.5 / (256 * n_inputs))
+
+def qlearner_learn(n_inputs):
+    '''QLearner.learn() for a learning brain with n_inputs inputs.'''
+    seed()
+    Network.eta = 0.5 / n_inputs
+    world = make_world(110)
+    animal = [e for e in world.entities.values() if isinstance(e, Ringoid)][0]
+    brain = Brain(animal, n_inputs, 4, animal.sensor, learning=True, genetic=False)
+    states = [[random.randint(0, 1) for i in range(n_inputs)] for j in range(2)]
+    def run():
+        for i, state in enumerate(states):
+            brain.run(state)
+            brain.learner.learn(state, i, -1)
+    return run
+
+def table_learn(n):
+    '''TableBrain.decide() and TableQLearner.learn() on n steps of a Ringoid's table brain.'''
+    seed()
+    world = make_world(110)
+    animal = [e for e in world.entities.values() if isinstance(e, Ringoid)][0]
+    brain = TableBrain(animal, animal.sensor, len(animal.actions))
+    states = [random.randrange(brain.n_states) for i in range(n)]
+    def run():
+        for state in states:
+            brain.learner.learn(state, brain.decide(state), -1)
+    return run
+
+def qlearner_replay(n_inputs):
+    '''QLearner.replay_batch() on a full buffer, for a brain with n_inputs inputs.'''
+    seed()
+    Network.eta = 0.5 / n_inputs
+    world = make_world(110)
+    animal = [e for e in world.entities.values() if isinstance(e, Ringoid)][0]
+    brain = Brain(animal, n_inputs, 4, animal.sensor, learning=True, genetic=False)
+    learner = brain.learner
+    states = [[random.randint(0, 1) for i in range(n_inputs)] \
+              for j in range(QLearner.REPLAY_CAPACITY + 1)]
+    for state, next_state in zip(states, states[1:]):
+        learner.get_buffer().add([state], [random.randrange(4)], [-1], [next_state])
+    return learner.replay_batch
+
+def bank_replay(n):
+    '''BrainBank.replay() for n Ringoid brains, each with a full buffer of its own.'''
+    seed()
+    world = make_world(10 * n, ringoids=0.1)
+    bank = world.brain_banks[Ringoid]
+    for brain in bank.brains:
+        buffer = brain.learner.get_buffer()
+        for i in range(QLearner.REPLAY_CAPACITY):
+            state = [random.randint(0, 1) for j in range(bank.n_senses)]
+            buffer.add([state], [random.randrange(bank.n_actions)], [-1], [state])
+    rows = list(range(len(bank)))
+    return lambda: bank.replay(rows)
+
+def calls(n, function, make_args):
+    '''A function that calls function on n sets of arguments from make_args().'''
+    seed()
+    args = [make_args() for i in range(n)]
+    def run():
+        for a in args:
+            function(*a)
+    return run
+
+def utils_get_endpoint(n):
+    '''get_endpoint() n times.'''
+    return calls(n, get_endpoint, lambda: (random.randint(0, 450), random.randint(0, 450),
+                                           random.randint(0, 359), random.randint(1, 20)))
+
+def utils_xy_dist(n):
+    '''xy_dist() n times.'''
+    return calls(n, xy_dist, lambda: (random.randint(0, 359), random.randint(1, 20)))
+
+def utils_get_point_dist(n):
+    '''get_point_dist() n times, wrapping around a 450 x 450 world.'''
+    return calls(n, get_point_dist, lambda: (random.randint(0, 450), random.randint(0, 450),
+                                             random.randint(0, 450), random.randint(0, 450),
+                                             450, 450))
+
+def utils_exp_luce_choice(n):
+    '''exp_luce_choice() n times on 4 values.'''
+    return calls(n, exp_luce_choice, lambda: ([random.uniform(-5, 5) for i in range(4)], 1.0))
+
+def geometry_endpoint(n):
+    '''endpoint() (the table lookup for get_endpoint()) n times.'''
+    return calls(n, endpoint, lambda: (random.randint(0, 450), random.randint(0, 450),
+                                       random.randint(0, 359), random.randint(1, 20)))
+
+def geometry_step_offset(n):
+    '''step_offset() (the table lookup for xy_dist()) n times.'''
+    return calls(n, step_offset, lambda: (random.randint(0, 359), random.randint(1, 20)))
+
+def arrays_point_dists(n):
+    '''point_dists() on n pairs of points at once, wrapping around a 450 x 450 world.'''
+    seed()
+    points = np.array([[random.randint(0, 450) for i in range(4)] for j in range(n)]).T
+    return lambda: point_dists(*points, 450, 450)
+
+def arrays_luce_choices(n):
+    '''luce_choices() on n rows of 4 values at once.'''
+    seed()
+    values = np.array([[random.uniform(-5, 5) for i in range(4)] for j in range(n)])
+    randoms = np.array([random.random() for j in range(n)])
+    return lambda: luce_choices(values, 1.0, randoms)
+
+BENCHMARKS = [('world.step', world_step, [110, 440, 1760]),
+              ('world.get_entities_coords', world_placement, [10, 100, 1000]),
+              ('critter.move', critter_move, [110, 440, 1760]),
+              ('world.find_mates', find_mates, [110, 440, 1760]),
+              ('feel.sense_symbolic', sense_symbolic, [110, 440, 1760]),
+              ('feel.symbolic2index', symbolic2index, [100, 1000]),
+              ('feel.symbolic2binary', symbolic2binary, [100, 1000]),
+              ('genome.crossover', genome_crossover, [3, 81, 729]),
+              ('genome.mutate', genome_mutate, [3, 81, 729]),
+              ('genome.get_best_action', genome_best_action, [3, 81, 729]),
+              ('network.run', network_run, [12, 48, 192]),
+              ('network.run_target', network_train, [12, 48, 192]),
+              ('network.train_batch', network_train_batch, [12, 48, 192]),
+              ('qlearner.learn', qlearner_learn, [12, 48, 192]),
+              ('tablebrain.learn', table_learn, [100, 1000]),
+              ('qlearner.replay_batch', qlearner_replay, [12, 48, 192]),
+              ('brainbank.replay', bank_replay, [10, 40, 160]),
+              ('utils.get_endpoint', utils_get_endpoint, [1000]),
+              ('utils.xy_dist', utils_xy_dist, [1000]),
+              ('utils.get_point_dist', utils_get_point_dist, [1000]),
+              ('utils.exp_luce_choice', utils_exp_luce_choice, [1000]),
+              ('geometry.endpoint', geometry_endpoint, [1000]),
+              ('geometry.step_offset', geometry_step_offset, [1000]),
+              ('arrays.point_dists', arrays_point_dists, [1000]),
+              ('arrays.luce_choices', arrays_luce_choices, [1000])]
+"""Name, function and sizes of each benchmark."""
+
+def time_function(function, repeat=REPEAT, min_time=MIN_TIME):
+    '''The number of calls per timing, and the seconds per call of each of repeat timings.'''
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(1.2 * min_time / elapsed))
+    times = [elapsed / number]
+    for r in range(repeat - 1):
+        start = time.perf_counter()
+        for i in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+    return number, times
+
+def run_benchmarks(pattern='', repeat=REPEAT, min_time=MIN_TIME, verbose=True):
+    '''Run the benchmarks whose names contain pattern, returning a list of result dicts.'''
+    results = []
+    # Settings that benchmarks change, to be put back after each one
+    saved = Genome.evolve, Network.eta
+    for name, function, sizes in BENCHMARKS:
+        if pattern not in name:
+            continue
+        for size in sizes:
+            number, times = time_function(function(size), repeat, min_time)
+            Genome.evolve, Network.eta = saved
+            result = {'name': name, 'size': size, 'number': number,
+                      'best': min(times), 'mean': sum(times) / len(times), 'times': times}
+            results.append(result)
+            if verbose:
+                print('{:26} {:6} {:12.3f} us'.format(name, size, result['best'] * 1e6))
+    return results
+
+def compare(results, old):
+    '''Print the ratio of old to new best times for benchmarks in both lists of results.'''
+    old_times = {(r['name'], r['size']): r['best'] for r in old}
+    for r in results:
+        before = old_times.get((r['name'], r['size']))
+        if before:
+            print('{:26} {:6} {:8.2f}x'.format(r['name'], r['size'], before / r['best']))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the simulation hot paths.')
+    parser.add_argument('--filter', default='', help='only benchmarks whose names contain this')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--min-time', type=float, default=MIN_TIME)
+    parser.add_argument('--output', default=None, help='save the results as JSON here')
+    parser.add_argument('--compare', default=None, help='JSON results to compare with')
+    args = parser.parse_args()
+    results = run_benchmarks(args.filter, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version, 'numpy': np.__version__,
+                       'platform': platform.platform(), 'time': time.time(),
+                       'results': results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            print('Speedup over', args.compare)
+            compare(results, json.load(f)['results'])
@@ -7,22 +7,46 @@
 ### Brain, a subclass of Network, but only actually implements the network
 ### if its learning attribute is True. It's responsible for deciding; how
 ### that works depends on whether the brain is a 'learning' or 'genetic' brain.
-
+### Each Layer keeps its weights in a NumPy array, so a Network can also run
+### and train on many patterns at once (run_batch(), train_batch()).
+### With QLearner.replay on, learners remember their transitions in fixed-size
+### ReplayBuffers and learn from random minibatches of them every few steps.
+### BrainBank stacks the weights of many learning brains so that a world can
+### run and train all of them at once.
+### TableBrain does Q learning with a lookup table instead of a network, for
+### sensors with few enough states to give each one a row.
+
+import numpy as np
 from utils import *
+from arrays import *
+from rng import *
 
 ## RANDOM WEIGHT AND ACTIVATION GENERATION
 
-def random_act(min_act, max_act):
+def random_act(min_act, max_act, rng=random):
     '''Generate a random activation between min_act and max_act.'''
-    return min_act + random.random() * (max_act - min_act)
+    return min_act + rng.random() * (max_act - min_act)
 
-def random_weight(wt_range, neg=True):
+def random_weight(wt_range, neg=True, rng=random):
     '''Generate a random weight within wt_range. If neg is True, value may be negative.'''
-    val = random.random() * wt_range
+    val = rng.random() * wt_range
     if neg:
         val = val - wt_range / 2
     return val
 
+def target_arrays(targets, size):
+    """Arrays of the values of targets (a list of targets, each a list of size values), and of
+    whether each value is to be learned: 'x' (or any string) means no learning into that unit."""
+    if isinstance(targets, np.ndarray) and targets.dtype.kind == 'f':
+        # NaN for no learning
+        mask = ~np.isnan(targets)
+        return np.where(mask, targets, 0.0), mask
+    mask = np.array([[not isinstance(t, str) for t in target] for target in targets],
+                    dtype=bool).reshape(-1, size)
+    values = np.array([[0.0 if isinstance(t, str) else t for t in target] for target in targets],
+                      dtype=float).reshape(-1, size)
+    return values, mask
+
 class Network:
     '''A feedforward neural network with an ordered set of Layers of units.'''
 
@@ -61,7 +85,9 @@ class Network:
             l.update()
 
     def run(self, pattern, target=[]):
-        '''Run the network on one pattern, returning the output pattern.'''
+        '''Run the network on one pattern, returning the output pattern (an array).
+        If target is given, train the network on it; 'x' in target means no learning
+        into that output unit.'''
         # Clamp the input Layer to the pattern (a list or tuple).
         # Fail if the pattern is the wrong length
         error = 0
@@ -69,7 +95,7 @@ class Network:
             # Update the other Layers in sequence
             self.propagate_forward()
             # Train
-            if target:
+            if len(target):
                 error = self.layers[-1].do_errors(target)
                 self.propagate_backward()
                 self.update_weights()
@@ -85,6 +111,56 @@ class Network:
         for l in reversed(self.layers[1:]):
             l.learn()
 
+    def run_batch(self, patterns):
+        '''Run the network on every row of patterns at once, returning an array of
+        output patterns, without changing the activations of the Layers.'''
+        outputs = np.asarray(patterns, dtype=float)
+        for l in self.layers[1:]:
+            outputs = l.outputs(outputs)
+        return outputs
+
+    def train_batch(self, patterns, targets, epochs=1, batch_size=None, eta=None):
+        '''Train the network on patterns and targets (a row each, with 'x' or NaN for no
+        learning into a unit) for epochs passes, batch_size patterns (all of them by default)
+        at a time. Each batch changes the weights once, by the sum of the changes run() would
+        make for its patterns from the same starting weights. eta is the learning rate, by
+        default Network.eta. Returns a list of the RMS error on each pass.'''
+        patterns = np.asarray(patterns, dtype=float)
+        values, mask = target_arrays(targets, self.layers[-1].size)
+        eta = Network.eta if eta is None else eta
+        n = len(patterns)
+        batch_size = batch_size or n
+        errors = []
+        for epoch in range(epochs):
+            total = 0.0
+            for start in range(0, n, batch_size):
+                end = start + batch_size
+                total += self.train_step(patterns[start:end], values[start:end],
+                                         mask[start:end], eta)
+            errors.append(math.sqrt(total / (n * self.layers[-1].size)))
+        return errors
+
+    def train_step(self, patterns, values, mask, eta):
+        '''Change the weights once for a batch of patterns with target values, where mask is
+        True. Returns the sum of the squared errors.'''
+        # Forward: the activations of every layer for every pattern
+        activations = [patterns]
+        for l in self.layers[1:]:
+            activations.append(l.outputs(activations[-1]))
+        errors = np.where(mask, values - activations[-1], 0.0)
+        squared = (errors * errors).sum()
+        # Backward: the deltas for every layer, from the weights before any are changed
+        deltas = []
+        for l, acts in zip(reversed(self.layers[1:]), reversed(activations[1:])):
+            delta = errors if l.linear else errors * sigmoid_slopes(acts)
+            deltas.append(delta)
+            errors = delta @ l.weights[:, :-1]
+        for l, delta, inputs in zip(reversed(self.layers[1:]), deltas, reversed(activations[:-1])):
+            l.weights[:, :-1] += eta * (delta.T @ inputs)
+            # Bias weights
+            l.weights[:, -1] += eta * delta.sum(axis=0)
+        return squared
+
     def show_activations(self):
         '''Print input pattern and output activation.'''
         for l in self.layers:
@@ -96,23 +172,25 @@ class Network:
             l.show_weights()
 
 class Layer:
-    '''A list of units, each with an activation.'''
+    '''An array of units, each with an activation.'''
 
-    def __init__(self, name, size=10, weight_range=.5, linear=False):
-        '''Initialize variables, but not the list of activations or weights.'''
+    def __init__(self, name, size=10, weight_range=.5, linear=False, rng=random):
+        '''Initialize variables, but not the weights.
+        Random activations and weights come from rng.'''
         self.size = size
+        self.rng = rng
         # Layer feeding this lLayer
         self.input_layer = None
         # Layer this Layer feeds
         self.output_layer = None
         # Whether the activation function is the identity function
         self.linear=linear
-        self.weights = []
+        self.weights = None
         self.name = name
         self.min_activation = 0.0
         self.max_activation = 1.0
         self.activations = self.gen_random_acts()
-        self.errors = [0.0 for u in range(self.size)]
+        self.errors = np.zeros(size)
         self.weight_range = weight_range
 
     def __str__(self):
@@ -120,68 +198,72 @@ class Layer:
         return self.name
 
     def initialize(self):
-        '''Create the activations and weights lists.'''
+        '''Create the weights.'''
         if self.input_layer:
             # This has an input_layer, so it has weights into it
             self.initialize_weights()
 
     def initialize_weights(self):
-        '''Create the weights list of lists and a bias for each unit.
+        '''Create the weights array, with a bias for each unit.
 
         Indices: [dest-index][input-unit-index]
-        Bias is the last value in each weight list (index self.input_layer.size)
+        Bias is the last value in each row (index self.input_layer.size)
         '''
-        self.weights = [ [random_weight(self.weight_range) for i in range(self.input_layer.size)] \
-                         # Bias weight
-                         + [random_weight(self.weight_range)] \
-                         for u in range(self.size)]
+        rng = self.rng
+        self.weights = np.array([[random_weight(self.weight_range, rng=rng) \
+                                  for i in range(self.input_layer.size)] \
+                                 # Bias weight
+                                 + [random_weight(self.weight_range, rng=rng)] \
+                                 for u in range(self.size)]).reshape(self.size, -1)
 
     def gen_random_acts(self):
         '''Generate random activations.'''
-        return [random_act(self.min_activation, self.max_activation) for u in range(self.size)]
+        return np.array([random_act(self.min_activation, self.max_activation, self.rng) \
+                         for u in range(self.size)])
 
     def clamp(self, v):
         '''Clamp pattern vector v on this Layer.'''
         if len(v) != self.size:
             print('Vector', v, 'is the wrong size')
         else:
-            for i in range(self.size):
-                self.activations[i] = v[i]
+            self.activations[:] = v
             return True
 
     def get_input(self, dest_i):
-        '''Get input into unit dest_i, including [1.0] for bias.'''
-        return dot_product(self.input_layer.activations + [1.0], self.weights[dest_i])
+        '''Get input into unit dest_i, including the bias.'''
+        weights = self.weights[dest_i]
+        return weights[:-1] @ self.input_layer.activations + weights[-1]
+
+    def outputs(self, inputs):
+        '''Array of the activations of the units (a row per row of inputs) given an array of
+        the activations of the input layer.'''
+        net = inputs @ self.weights[:, :-1].T + self.weights[:, -1]
+        return net if self.linear else sigmoids(net, 0.0, 1.0)
 
     def update(self):
         '''Update unit activations.'''
-        for index in range(self.size):
-            inp = self.get_input(index)
-            self.activations[index] = inp if self.linear else sigmoid(inp, 0.0, 1.0)
+        self.activations[:] = self.outputs(self.input_layer.activations)
 
     def do_errors(self, target):
-        '''Figure the errors for each (output) unit, given the target pattern, returning RMS error.'''
-        error = 0.0
-        for i in range(self.size):
-            target_i = target[i]
-            if isinstance(target_i, str):
-                # Indicates there should be no learning into this output unit
-                self.errors[i] = 0.0
-            else:
-                e = target_i - self.activations[i]
-                self.errors[i] = e
-                error += e * e
-        return math.sqrt(error / self.size)
+        '''Figure the errors for each (output) unit, given the target pattern, returning RMS error.
+        A string (like 'x') in target means there should be no learning into that unit.'''
+        values, mask = target_arrays([target], self.size)
+        self.errors[:] = np.where(mask[0], values[0] - self.activations, 0.0)
+        return math.sqrt((self.errors * self.errors).sum() / self.size)
+
+    def update_error(self):
+        '''Figure the errors for each (hidden) unit from the errors of the Layer it feeds.'''
+        out = self.output_layer
+        deltas = out.errors if out.linear else out.errors * sigmoid_slopes(out.activations)
+        self.errors[:] = deltas @ out.weights[:, :-1]
 
     def learn(self):
         '''Update the weights into the layer.'''
-        for u in range(self.size):
-            error = self.errors[u]
-            act_slope = 1.0 if self.linear else sigmoid_slope(self.activations[u])
-            for i in range(self.input_layer.size):
-                self.weights[u][i] += error * Network.eta * act_slope * self.input_layer.activations[i]
-            # Bias weight
-            self.weights[u][self.input_layer.size] += Network.eta * error * act_slope
+        deltas = self.errors if self.linear else self.errors * sigmoid_slopes(self.activations)
+        deltas = Network.eta * deltas
+        self.weights[:, :-1] += np.outer(deltas, self.input_layer.activations)
+        # Bias weights
+        self.weights[:, -1] += deltas
 
     def show_activations(self):
         '''Print activations.'''
@@ -211,13 +293,16 @@ class Brain(Network):
         if learning:
             # Only actually create the neural network if learning is True
             Network.__init__(self, animal.__str__() + '_brain',
-                             [Layer('sense_in', n_senses),
-                              Layer('act_out', n_actions, weight_range=0.0, linear=True)])
+                             [Layer('sense_in', n_senses, rng=animal.rng),
+                              Layer('act_out', n_actions, weight_range=0.0, linear=True,
+                                    rng=animal.rng)])
         self.animal = animal
         self.n_actions = n_actions
         self.n_senses = n_senses
         self.genetic = genetic
         self.learning = learning
+        # BrainBank this brain's weights are stacked in, if any
+        self.bank = None
         if learning:
             # Create the learner only if learning is True
             self.learner = QLearner(self)
@@ -226,13 +311,13 @@ class Brain(Network):
         '''Decide what to do by choosing an action index.'''
         if self.learning:
             # Uses q values in the learning version
-            return exp_luce_choice(self.get_Qs(state), Brain.exploitation)
+            return exp_luce_choice(self.get_Qs(state), Brain.exploitation, self.animal.rng)
         elif self.genetic:
             # Let the genome decide
             return self.animal.genome.get_best_action(state)
         else:
             # Randomly choose an action index
-            return random.randint(0, self.n_actions - 1)
+            return self.animal.rng.randint(0, self.n_actions - 1)
 
     def get_Qs(self, state, run=True):
         """The Q values for a given state input.
@@ -242,18 +327,114 @@ class Brain(Network):
         else:
             return self.layers[-1].activations
 
+class TableBrain(Brain):
+    """A learning brain that keeps a Q value for every state and action in a table,
+    for a sensor with a finite number of states, which it senses as indices."""
+
+    eta = .25
+    """Learning rate: how far a Q value moves toward its target on each update.
+    Tables only learn while Network.eta is not 0, like network brains."""
+
+    def __init__(self, animal, sensor, n_actions):
+        """The table has a row for each of the sensor's states, all Q values starting at 0."""
+        Brain.__init__(self, animal, sensor.get_n_state_features(), n_actions,
+                       sensor, genetic=False, learning=False)
+        self.learning = True
+        self.n_states = sensor.get_n_states()
+        # The table is indexed by state, so the sensor has to give indices
+        sensor.indexed = True
+        # Indices: [state-index][action-index]
+        self.table = np.zeros((self.n_states, n_actions))
+        self.learner = TableQLearner(self)
+
+    def decide(self, state):
+        '''Choose an action index for state, exploring as Brain.decide() does.'''
+        return exp_luce_choice(self.table[state].tolist(), Brain.exploitation, self.animal.rng)
+
+    def get_Qs(self, state, run=True):
+        """The Q values for a state index."""
+        return self.table[state].tolist()
+
+    def run(self, state):
+        """The Q values for a state index, as Network.run() gives a network's outputs."""
+        return self.get_Qs(state)
+
+    def update(self, state, action, target):
+        """Move the Q value of action in state toward target."""
+        self.table[state, action] += TableBrain.eta * (target - self.table[state, action])
+
+    def show_weights(self):
+        '''Print the Q values of the states that have any.'''
+        for state in np.flatnonzero(self.table.any(axis=1)).tolist():
+            print(str(state).ljust(5), ' '.join('%+.3f' % q for q in self.table[state].tolist()))
+
+class ReplayBuffer:
+    """The latest transitions (state, action, reinforcement, next state) of one or more
+    learners, up to a fixed number, in arrays allocated once; the oldest are overwritten."""
+
+    ARRAYS = ('states', 'actions', 'reinforcements', 'next_states')
+    """Names of the arrays holding the transitions."""
+
+    def __init__(self, n_senses, capacity, rng):
+        """Make room for capacity transitions, sampled with the random.Random rng."""
+        self.capacity = capacity
+        self.rng = rng
+        self.states = np.zeros((capacity, n_senses))
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.reinforcements = np.zeros(capacity)
+        self.next_states = np.zeros((capacity, n_senses))
+        # Number of transitions stored, and the position for the next one
+        self.n = 0
+        self.next = 0
+
+    def __len__(self):
+        """Number of transitions stored."""
+        return self.n
+
+    def add(self, states, actions, reinforcements, next_states):
+        """Store transitions, one per row (or element) of each argument."""
+        k = len(actions)
+        positions = (self.next + np.arange(k)) % self.capacity
+        self.states[positions] = states
+        self.actions[positions] = actions
+        self.reinforcements[positions] = reinforcements
+        self.next_states[positions] = next_states
+        self.next = (self.next + k) % self.capacity
+        self.n = min(self.capacity, self.n + k)
+
+    def sample(self, size):
+        """Array of the positions of size stored transitions, chosen at random with replacement."""
+        return (uniforms(self.rng, size) * self.n).astype(np.int64)
+
 class QLearner:
     """Learn Q values in a neural network."""
 
     gamma = .8
     """Discount rate for Q learning."""
 
+    replay = False
+    """Whether to learn from minibatches of remembered transitions, rather than from each
+    transition as it happens."""
+
+    REPLAY_SHARED = False
+    """Whether the learners of a species share one buffer (kept by their BrainBank)."""
+    REPLAY_CAPACITY = 1000
+    """Number of transitions a buffer holds."""
+    REPLAY_BATCH = 32
+    """Number of transitions in a minibatch."""
+    REPLAY_EVERY = 4
+    """Learn from a minibatch every this many steps."""
+
     def __init__(self, brain):
         """Initialize the 3 entities that need to be remembered from the previous time step."""
         self.brain = brain
         self.last_reinforcement = 0
         self.last_state = None
         self.last_action = None
+        # Remembered transitions, made when the first one arrives, if replay is on
+        self.buffer = None
+        # Number of transitions so far
+        self.transitions = 0
 
     def newQ(self):
         """Assumes the brain network has just been run in the 'next' state."""
@@ -270,9 +451,235 @@ class QLearner:
     def learn(self, new_state, new_action, new_reinforcement):
         """Run the network with the last state as input and update the weights into the last action unit."""
         # Don't learn if this is the first time step of learning
-        if self.last_state:
-            self.brain.run(self.last_state, self.make_target())
+        if self.last_state is not None:
+            if QLearner.replay:
+                self.remember(new_state)
+            else:
+                self.brain.run(self.last_state, self.make_target())
+        # Update the stored values for learning on the next time step
+        self.last_reinforcement = new_reinforcement
+        self.last_state = new_state
+        self.last_action = new_action
+
+    def get_buffer(self):
+        """The learner's replay buffer, made if it doesn't exist yet."""
+        if self.buffer is None:
+            self.buffer = ReplayBuffer(self.brain.n_senses, QLearner.REPLAY_CAPACITY,
+                                       self.brain.animal.rng)
+        return self.buffer
+
+    def remember(self, new_state):
+        """Store the transition from the last state to new_state, and learn from a
+        minibatch if one is due."""
+        self.get_buffer().add([self.last_state], [self.last_action], [self.last_reinforcement],
+                              [new_state])
+        self.transitions += 1
+        if self.transitions % QLearner.REPLAY_EVERY == 0 and Network.eta:
+            self.replay_batch()
+
+    def replay_batch(self):
+        """Train the network once on a minibatch of remembered transitions, toward the
+        Q values newQ() would give them now. The change is the mean of the changes the
+        transitions would make one at a time."""
+        buffer = self.buffer
+        rows = buffer.sample(QLearner.REPLAY_BATCH)
+        next_Qs = self.brain.run_batch(buffer.next_states[rows])
+        # No learning into the actions not taken
+        targets = np.full((len(rows), self.brain.n_actions), np.nan)
+        targets[np.arange(len(rows)), buffer.actions[rows]] = \
+            buffer.reinforcements[rows] + QLearner.gamma * next_Qs.max(axis=1)
+        self.brain.train_batch(buffer.states[rows], targets, eta=Network.eta / len(rows))
+
+class TableQLearner(QLearner):
+    """Learn Q values in a TableBrain's table, one transition at a time."""
+
+    def learn(self, new_state, new_action, new_reinforcement):
+        """Update the Q value of the last action in the last state."""
+        # Don't learn if this is the first time step of learning (state 0 is a state),
+        # or if learning is turned off
+        if self.last_state is not None and Network.eta:
+            table = self.brain.table
+            self.brain.update(self.last_state, self.last_action,
+                              self.last_reinforcement + QLearner.gamma * table[new_state].max())
         # Update the stored values for learning on the next time step
         self.last_reinforcement = new_reinforcement
         self.last_state = new_state
         self.last_action = new_action
+
+class BrainBank:
+    """The output weights of a population of two-layer learning Brains of the same shape,
+    stacked into one array so that all of them can be run and trained at once.
+
+    Each brain still has its own network: the weights of its output Layer are a view of
+    its row in the stack, so running or training a single brain on its own still works."""
+
+    def __init__(self, n_senses, n_actions, capacity=16, rng=random):
+        """Create room for capacity brains with n_senses inputs and n_actions outputs.
+        A shared replay buffer draws its samples from rng."""
+        self.n_senses = n_senses
+        self.n_actions = n_actions
+        self.rng = rng
+        # Replay buffer shared by all the brains, if QLearner.REPLAY_SHARED, and the
+        # number of times transitions have been added to it
+        self.buffer = None
+        self.transitions = 0
+        # Indices: [brain-index][dest-index][input-unit-index], bias last, as in Layer.weights
+        self.weights = np.zeros((capacity, n_actions, n_senses + 1))
+        # The brain in each row of weights
+        self.brains = []
+        # Inputs and Q values for each brain on the current time step
+        self.states = None
+        self.Qs = None
+
+    def __len__(self):
+        """Number of brains in the bank."""
+        return len(self.brains)
+
+    @staticmethod
+    def batchable(brain):
+        """Can the brain be run as part of a bank?"""
+        return brain.learning and not isinstance(brain, TableBrain) and \
+               len(brain.layers) == 2 and brain.layers[-1].linear
+
+    def grow(self):
+        """Double the number of rows in the stack."""
+        weights = np.zeros((2 * len(self.weights),) + self.weights.shape[1:])
+        weights[:len(self.brains)] = self.weights[:len(self.brains)]
+        self.weights = weights
+        for row, brain in enumerate(self.brains):
+            brain.layers[-1].weights = weights[row]
+
+    def add(self, brain):
+        """Move the brain's output weights into the next free row."""
+        if len(self.brains) == len(self.weights):
+            self.grow()
+        row = len(self.brains)
+        self.weights[row] = brain.layers[-1].weights
+        brain.layers[-1].weights = self.weights[row]
+        brain.bank = self
+        brain.bank_row = row
+        self.brains.append(brain)
+
+    def remove(self, brain):
+        """Give the brain back its own weights, moving the brain in the last row into its row."""
+        row = brain.bank_row
+        last = len(self.brains) - 1
+        brain.layers[-1].weights = self.weights[row].copy()
+        brain.bank = None
+        if row != last:
+            moved = self.brains[last]
+            self.weights[row] = self.weights[last]
+            moved.layers[-1].weights = self.weights[row]
+            moved.bank_row = row
+            self.brains[row] = moved
+        self.brains.pop()
+
+    def get_Qs(self, states):
+        """The Q values of every brain (one row each) for states (one row each)."""
+        weights = self.weights[:len(self.brains)]
+        return np.einsum('bai,bi->ba', weights[:, :, :-1], states) + weights[:, :, -1]
+
+    def decide(self, states):
+        """Choose an action for every brain, as Brain.decide() would, given a dict of
+        states indexed by entity id. Returns a dict of action indices indexed by entity id.
+        A bank whose brains have all died is kept (with its shared buffer and stream) for
+        brains born later, and decides nothing."""
+        if not self.brains:
+            self.states = []
+            return {}
+        self.states = [states[brain.animal.id] for brain in self.brains]
+        self.Qs = self.get_Qs(np.array(self.states, dtype=float).reshape(len(self.brains), -1))
+        # One random number from each brain's animal's stream, as in exp_luce_choice()
+        randoms = [brain.animal.rng.random() for brain in self.brains]
+        choices = luce_choices(self.Qs, Brain.exploitation, randoms).tolist()
+        return {brain.animal.id: choice for brain, choice in zip(self.brains, choices)}
+
+    def learn(self, actions, reinforcements):
+        """Do what QLearner.learn() does for every brain, in one masked update of the
+        weights into each brain's last action, after the brains have decided on actions
+        and received reinforcements (dicts indexed by entity id) on this time step."""
+        if not self.brains:
+            return
+        learners = [brain.learner for brain in self.brains]
+        # Don't learn if this is the first time step of learning
+        rows = [row for row, learner in enumerate(learners) if learner.last_state is not None]
+        if QLearner.replay:
+            if rows:
+                due = self.remember(learners, rows)
+                if due and Network.eta:
+                    self.replay(due)
+        elif rows and Network.eta:
+            last_states = np.array([learners[row].last_state for row in rows], dtype=float)
+            last_actions = np.array([learners[row].last_action for row in rows])
+            last_reinforcements = np.array([learners[row].last_reinforcement for row in rows],
+                                           dtype=float)
+            # What QLearner.newQ() is for each brain, from this time step's Q values
+            targets = last_reinforcements + QLearner.gamma * self.Qs[rows].max(axis=1)
+            weights = self.weights[rows, last_actions]
+            # Linear output units, so the activation slope is 1
+            errors = targets - np.einsum('bi,bi->b', weights[:, :-1], last_states) - weights[:, -1]
+            self.weights[rows, last_actions, :-1] += Network.eta * errors[:, None] * last_states
+            # Bias weight
+            self.weights[rows, last_actions, -1] += Network.eta * errors
+        # Update the stored values for learning on the next time step
+        for brain, learner, state in zip(self.brains, learners, self.states):
+            learner.last_reinforcement = reinforcements[brain.animal.id]
+            learner.last_state = state
+            learner.last_action = actions[brain.animal.id]
+
+    def remember(self, learners, rows):
+        """Store the transitions of the learners in rows, from their last states to this
+        time step's states, in the shared buffer or in each learner's own. Returns the
+        rows of the brains due to learn from a minibatch."""
+        states = np.array([learners[row].last_state for row in rows], dtype=float)
+        actions = [learners[row].last_action for row in rows]
+        reinforcements = [learners[row].last_reinforcement for row in rows]
+        next_states = np.array([self.states[row] for row in rows], dtype=float)
+        if QLearner.REPLAY_SHARED:
+            if self.buffer is None:
+                self.buffer = ReplayBuffer(self.n_senses, QLearner.REPLAY_CAPACITY, self.rng)
+            self.buffer.add(states, actions, reinforcements, next_states)
+            self.transitions += 1
+            if self.transitions % QLearner.REPLAY_EVERY == 0:
+                return list(range(len(self.brains)))
+            return []
+        due = []
+        for i, row in enumerate(rows):
+            learner = learners[row]
+            learner.get_buffer().add(states[i:i + 1], actions[i:i + 1],
+                                     reinforcements[i:i + 1], next_states[i:i + 1])
+            learner.transitions += 1
+            if learner.transitions % QLearner.REPLAY_EVERY == 0:
+                due.append(row)
+        return due
+
+    def replay(self, rows):
+        """Do what QLearner.replay_batch() does for the brains in rows, all at once: each
+        brain learns from a minibatch from its own buffer, or they all learn from the
+        same minibatch from the shared buffer."""
+        size = QLearner.REPLAY_BATCH
+        if QLearner.REPLAY_SHARED:
+            sample = self.buffer.sample(size)
+            buffers = [self.buffer] * len(rows)
+            samples = [sample] * len(rows)
+        else:
+            buffers = [self.brains[row].learner.buffer for row in rows]
+            samples = [buffer.sample(size) for buffer in buffers]
+        # Indices: [brain][transition][...]
+        states = np.stack([b.states[s] for b, s in zip(buffers, samples)])
+        actions = np.stack([b.actions[s] for b, s in zip(buffers, samples)])
+        reinforcements = np.stack([b.reinforcements[s] for b, s in zip(buffers, samples)])
+        next_states = np.stack([b.next_states[s] for b, s in zip(buffers, samples)])
+        weights = self.weights[rows]
+        next_Qs = np.einsum('bai,bmi->bma', weights[:, :, :-1], next_states) \
+                  + weights[:, None, :, -1]
+        targets = reinforcements + QLearner.gamma * next_Qs.max(axis=2)
+        # The weights into the action taken in each transition
+        taken = np.take_along_axis(weights, actions[:, :, None], axis=1)
+        errors = targets - np.einsum('bmi,bmi->bm', taken[:, :, :-1], states) - taken[:, :, -1]
+        # Linear output units, so the deltas are the errors, into the actions taken only
+        deltas = errors[:, :, None] * (actions[:, :, None] == np.arange(self.n_actions))
+        eta = Network.eta / size
+        self.weights[rows, :, :-1] += eta * np.einsum('bma,bmi->bai', deltas, states)
+        # Bias weights
+        self.weights[rows, :, -1] += eta * deltas.sum(axis=1)
@@ -0,0 +1,284 @@
+### Saving a running world to a compact binary checkpoint, and restoring it.
+###
+### A checkpoint file is laid out as
+###   MAGIC | header length (8 bytes, little-endian) | JSON header | arrays
+### The header describes the world (size, steps, population spec, parameters,
+### seed and the states of the world's random number streams) and gives the
+### dtype, shape and offset of each array. Each array is stored contiguously,
+### aligned to ALIGN bytes, so restore() reads them straight out of a memory
+### map of the file: the store columns, the entities' random number streams,
+### each species' stacked genomes, brain weights and QLearner memory,
+### including any replay buffers.
+
+import json, os, struct
+import numpy as np
+from world import *
+
+MAGIC = b'EWCKPT01'
+"""First bytes of every checkpoint file."""
+
+ALIGN = 64
+"""Arrays start at multiples of this many bytes."""
+
+def save(world, path):
+    '''Write a checkpoint of world, between steps, to path.
+    The file is written under another name first and then renamed, so an
+    interrupted save never leaves a broken checkpoint at path.'''
+    store = world.store
+    n = store.n
+    entities = store.entities[:n]
+    types = []
+    for entity in entities:
+        if type(entity) not in types:
+            types.append(type(entity))
+    arrays = {'type': np.array([types.index(type(e)) for e in entities], dtype=np.int64),
+              'id': np.array([e.id for e in entities], dtype=np.int64),
+              # Orders the entities are visited in, which later steps can depend on
+              'order': np.array(list(world.entities), dtype=np.int64),
+              'space': np.array([i for cell in world.space.cells for i in cell], dtype=np.int64)}
+    # The kind and texture codes depend on the order the store first saw each type and
+    # texture, and restored entities get them again
+    for name in EntityStore.COLUMNS:
+        if name not in ('kind', 'texture'):
+            arrays['store.' + name] = getattr(store, name)[:n]
+    states = [e.rng.getstate() for e in entities]
+    arrays['rng.state'] = np.array([state[1] for state in states], dtype=np.uint32).reshape(n, -1)
+    arrays['rng.gauss'] = np.array([np.nan if state[2] is None else state[2] for state in states])
+    species = {}
+    for typ in types:
+        members = [e for e in entities if type(e) is typ]
+        prefix = typ.__name__ + '.'
+        slots = np.array([e.slot for e in members], dtype=np.int64)
+        if getattr(members[0], 'genome', None) is not None:
+            arrays['genome.' + prefix + 'slots'] = slots
+            arrays['genome.' + prefix + 'bits'] = np.stack([e.genome.bits for e in members])
+        brain = getattr(members[0], 'brain', None)
+        if isinstance(brain, TableBrain):
+            arrays['table.' + prefix + 'slots'] = slots
+            arrays['table.' + prefix + 'Qs'] = np.stack([e.brain.table for e in members])
+            learners = [e.brain.learner for e in members]
+            arrays['table.' + prefix + 'last_state'] = \
+                np.array([-1 if l.last_state is None else l.last_state for l in learners],
+                         dtype=np.int64)
+            arrays['table.' + prefix + 'last_action'] = \
+                np.array([-1 if l.last_action is None else l.last_action for l in learners],
+                         dtype=np.int64)
+            arrays['table.' + prefix + 'last_reinforcement'] = \
+                np.array([l.last_reinforcement for l in learners], dtype=float)
+        elif brain is not None and brain.learning:
+            arrays['brain.' + prefix + 'slots'] = slots
+            for i in range(1, len(brain.layers)):
+                arrays['brain.' + prefix + 'weights%d' % i] = \
+                    np.stack([e.brain.layers[i].weights for e in members])
+            learners = [e.brain.learner for e in members]
+            arrays['brain.' + prefix + 'last_state'] = \
+                np.array([[0.0] * brain.n_senses if l.last_state is None else l.last_state \
+                          for l in learners], dtype=float).reshape(len(members), -1)
+            arrays['brain.' + prefix + 'has_last'] = \
+                np.array([l.last_state is not None for l in learners])
+            arrays['brain.' + prefix + 'last_action'] = \
+                np.array([-1 if l.last_action is None else l.last_action for l in learners],
+                         dtype=np.int64)
+            arrays['brain.' + prefix + 'last_reinforcement'] = \
+                np.array([l.last_reinforcement for l in learners], dtype=float)
+            arrays['brain.' + prefix + 'transitions'] = \
+                np.array([l.transitions for l in learners], dtype=np.int64)
+            buffers = [l.buffer for l in learners]
+            if any(buffers):
+                arrays['brain.' + prefix + 'has_buffer'] = \
+                    np.array([b is not None for b in buffers])
+                arrays['brain.' + prefix + 'buffer_places'] = \
+                    np.array([[b.n, b.next] if b else [0, 0] for b in buffers], dtype=np.int64)
+                empty = ReplayBuffer(brain.n_senses, QLearner.REPLAY_CAPACITY, None)
+                for name in ReplayBuffer.ARRAYS:
+                    arrays['brain.' + prefix + 'buffer.' + name] = \
+                        np.stack([getattr(b or empty, name) for b in buffers])
+        species[typ.__name__] = {'n': len(members), 'tabular': isinstance(brain, TableBrain)}
+        bank = world.brain_banks.get(typ)
+        if bank:
+            arrays['bank.' + prefix + 'ids'] = \
+                np.array([brain.animal.id for brain in bank.brains], dtype=np.int64)
+            species[typ.__name__]['bank'] = {'rng': bank.rng.getstate(),
+                                             'transitions': bank.transitions}
+            if bank.buffer:
+                species[typ.__name__]['bank']['buffer'] = [bank.buffer.n, bank.buffer.next]
+                for name in ReplayBuffer.ARRAYS:
+                    arrays['bank.' + prefix + 'buffer.' + name] = getattr(bank.buffer, name)
+    header = {'width': world.width, 'height': world.height, 'steps': world.steps,
+              'seed': world.seed, 'streams': world.streams, 'ids': world.ids,
+              'rng': world.rng.getstate(),
+              'array_rng': world.array_rng.bit_generator.state,
+              'populations': {typ.__name__: counts for typ, counts in world.populations.items()},
+              'types': [typ.__name__ for typ in types],
+              'species': species,
+              'settings': {'evolve': Genome.evolve, 'mutation': Genome.MUTATION,
+                           'crossover': Genome.CROSSOVER, 'eta': Network.eta,
+                           'exploitation': Brain.exploitation, 'gamma': QLearner.gamma,
+                           'table_eta': TableBrain.eta,
+                           'replay': QLearner.replay, 'replay_shared': QLearner.REPLAY_SHARED,
+                           'replay_capacity': QLearner.REPLAY_CAPACITY,
+                           'replay_batch': QLearner.REPLAY_BATCH,
+                           'replay_every': QLearner.REPLAY_EVERY},
+              'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                                  'offset': offset}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    encoded = json.dumps(header).encode()
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        f.write(b'\0' * (-f.tell() % ALIGN))
+        start = f.tell()
+        for name, array in arrays.items():
+            f.seek(start + header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+def read(path):
+    '''The header of the checkpoint at path, and a dict of its arrays, which are
+    read-only views of a memory map of the file.'''
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(path + ' is not a checkpoint')
+        length, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(length))
+        start = f.tell() + (-f.tell() % ALIGN)
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        begin = start + spec['offset']
+        arrays[name] = raw[begin:begin + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header, arrays
+
+def restore(path):
+    '''A world restored from the checkpoint at path, ready to go on stepping.
+    Also restores the evolution and learning parameters.'''
+    header, arrays = read(path)
+    settings = header['settings']
+    # Before any replay buffers are made
+    QLearner.REPLAY_CAPACITY = settings.get('replay_capacity', QLearner.REPLAY_CAPACITY)
+    names = dict(globals())
+    types = [names[name] for name in header['types']]
+    populations = {names[name]: counts for name, counts in header['populations'].items()}
+    # Species get the same kind of brain they had
+    for typ in types:
+        if hasattr(typ, 'tabular'):
+            typ.tabular = header['species'][typ.__name__].get('tabular', False)
+    world = World(header['width'], header['height'], entities=populations, populate=False,
+                  seed=header['seed'])
+    world.steps = header['steps']
+    xs = arrays['store.x'].tolist()
+    ys = arrays['store.y'].tolist()
+    entities = []
+    by_id = {}
+    # The entities go into the same slots they had, without running their constructors,
+    # whose random draws would all be overwritten (see Entity.restored())
+    for code, entity_id, x, y in zip(arrays['type'].tolist(), arrays['id'].tolist(), xs, ys):
+        entity = types[code].restored(world, entity_id, (x, y))
+        entities.append(entity)
+        by_id[entity_id] = entity
+    for entity_id in arrays['order'].tolist():
+        world.insert_entity(by_id[entity_id])
+    # Put the spatial cells and brain banks back in their old orders too
+    space = world.space
+    for cell in space.cells:
+        cell.clear()
+    for entity_id in arrays['space'].tolist():
+        space.insert(by_id[entity_id])
+    for typ, bank in world.brain_banks.items():
+        bank.brains = [by_id[i].brain for i in arrays['bank.' + typ.__name__ + '.ids'].tolist()]
+        for row, brain in enumerate(bank.brains):
+            brain.bank_row = row
+            brain.layers[-1].weights = bank.weights[row]
+        spec = header['species'][typ.__name__]['bank']
+        version, state, gauss = spec['rng']
+        bank.rng.setstate((version, tuple(state), gauss))
+        bank.transitions = spec['transitions']
+        if 'buffer' in spec:
+            bank.buffer = ReplayBuffer(bank.n_senses, QLearner.REPLAY_CAPACITY, bank.rng)
+            bank.buffer.n, bank.buffer.next = spec['buffer']
+            for name in ReplayBuffer.ARRAYS:
+                getattr(bank.buffer, name)[...] = arrays['bank.' + typ.__name__ + '.buffer.' + name]
+    n = len(entities)
+    for entity, state, gauss in zip(entities, arrays['rng.state'].tolist(),
+                                    arrays['rng.gauss'].tolist()):
+        entity.rng.setstate((3, tuple(state), None if math.isnan(gauss) else gauss))
+    version, state, gauss = header['rng']
+    world.rng.setstate((version, tuple(state), gauss))
+    world.array_rng.bit_generator.state = header['array_rng']
+    world.streams = header['streams']
+    world.ids = header['ids']
+    store = world.store
+    for name in EntityStore.COLUMNS:
+        if name not in ('kind', 'texture'):
+            getattr(store, name)[:n] = arrays['store.' + name]
+    store.recount()
+    for typ in types:
+        prefix = typ.__name__ + '.'
+        if 'genome.' + prefix + 'slots' in arrays:
+            for slot, bits in zip(arrays['genome.' + prefix + 'slots'].tolist(),
+                                  arrays['genome.' + prefix + 'bits']):
+                genome = entities[slot].genome
+                genome.bits = np.array(bits)
+                genome.invalidate()
+        if 'table.' + prefix + 'slots' in arrays:
+            for slot, Qs, state, action, reinforcement in \
+                zip(arrays['table.' + prefix + 'slots'].tolist(), arrays['table.' + prefix + 'Qs'],
+                    arrays['table.' + prefix + 'last_state'].tolist(),
+                    arrays['table.' + prefix + 'last_action'].tolist(),
+                    arrays['table.' + prefix + 'last_reinforcement'].tolist()):
+                brain = entities[slot].brain
+                brain.table[...] = Qs
+                brain.learner.last_state = state if state >= 0 else None
+                brain.learner.last_action = action if action >= 0 else None
+                brain.learner.last_reinforcement = reinforcement
+        if 'brain.' + prefix + 'slots' in arrays:
+            slots = arrays['brain.' + prefix + 'slots'].tolist()
+            brains = [entities[slot].brain for slot in slots]
+            for i in range(1, len(brains[0].layers)):
+                for brain, weights in zip(brains, arrays['brain.' + prefix + 'weights%d' % i]):
+                    # In place, since they may be a view into a BrainBank
+                    brain.layers[i].weights[...] = weights
+            for brain, state, has_last, action, reinforcement in \
+                zip(brains, arrays['brain.' + prefix + 'last_state'].tolist(),
+                    arrays['brain.' + prefix + 'has_last'].tolist(),
+                    arrays['brain.' + prefix + 'last_action'].tolist(),
+                    arrays['brain.' + prefix + 'last_reinforcement'].tolist()):
+                learner = brain.learner
+                learner.last_state = state if has_last else None
+                learner.last_action = action if action >= 0 else None
+                learner.last_reinforcement = reinforcement
+            for brain, transitions in zip(brains, arrays['brain.' + prefix + 'transitions'].tolist()):
+                brain.learner.transitions = transitions
+            if 'brain.' + prefix + 'has_buffer' in arrays:
+                for row, (brain, has_buffer, (n, position)) in \
+                    enumerate(zip(brains, arrays['brain.' + prefix + 'has_buffer'].tolist(),
+                                  arrays['brain.' + prefix + 'buffer_places'].tolist())):
+                    if has_buffer:
+                        buffer = brain.learner.get_buffer()
+                        buffer.n, buffer.next = n, position
+                        for name in ReplayBuffer.ARRAYS:
+                            getattr(buffer, name)[...] = \
+                                arrays['brain.' + prefix + 'buffer.' + name][row]
+    Genome.evolve = settings['evolve']
+    Genome.MUTATION = settings['mutation']
+    Genome.CROSSOVER = settings['crossover']
+    Network.eta = settings['eta']
+    Brain.exploitation = settings['exploitation']
+    QLearner.gamma = settings['gamma']
+    TableBrain.eta = settings.get('table_eta', TableBrain.eta)
+    QLearner.replay = settings.get('replay', False)
+    QLearner.REPLAY_SHARED = settings.get('replay_shared', False)
+    QLearner.REPLAY_BATCH = settings.get('replay_batch', QLearner.REPLAY_BATCH)
+    QLearner.REPLAY_EVERY = settings.get('replay_every', QLearner.REPLAY_EVERY)
+    return world
@@ -2,21 +2,31 @@
 ### Cognitive Science Program, Indiana University
 ### Michael Gasser: gasser@cs.indiana.edu
 ###
-### The entities that populate the world, each with an associated Canvas object in the GUI.
+### The entities that populate the world. Each can be drawn as a Canvas object
+### by a renderer (see view.py), but none of them depends on Tk.
+### Their numeric attributes live in the world's EntityStore (see store.py).
 
+import numpy as np
 from utils import *
 from brain import *
 from genome import *
+from geometry import *
 
-## Entities create their own Canvas object and record its id (different from self.id)
+def column(name, doc):
+    '''A property viewing into the entity's slot in the store column called name.'''
+    def get(self):
+        return getattr(self.store, name).item(self.slot)
+    def set(self, value):
+        getattr(self.store, name)[self.slot] = value
+    return property(get, set, doc=doc)
 
 class Entity:
 
     RADIUS = 10
-    """Radius of the Canvas object representing the entity."""
+    """Radius of the entity's body."""
 
     N = 0
-    """Number of entities created."""
+    """Number of entities created, in all worlds; each world numbers its own (World.new_id())."""
 
     color = 'red'
     """Color of the entity's Canvas object."""
@@ -24,31 +34,51 @@ class Entity:
     outline = 'white'
     """Outline color for Canvas object."""
 
+    rng = None
+    """The entity's stream of random numbers; a recycled entity reseeds the one it had."""
+
+    genome = None
+    """The entity's genome, if it has one; a recycled entity reuses the one it had."""
+
+    @property
+    def texture(self):
+        '''What the entity feels like to a feeler; its code is in the store.'''
+        return self.store.texture_names[self.store.texture.item(self.slot)]
+
+    @texture.setter
+    def texture(self, texture):
+        self.store.texture[self.slot] = self.store.texture_code(texture)
+
+    alive = column('alive', "Whether the entity is living.")
+    mortal = column('mortal', "Whether the entity ages and dies.")
+
     def __init__(self, world, coords):
-        """Initialize location, food type, texture, solidity, id."""
-        self.coords = coords
+        """Initialize location, id, and the parts (food type, texture, solidity...)."""
         self.world = world
-        self.food = Entity
-        self.id = Entity.N
-        self.texture = 'empty'
-        self.solid = True
+        # Give the entity a slot in the world's store for its numeric attributes
+        self.store = world.store
+        self.store.add(self)
+        # The entity's own stream of random numbers
+        self.rng = world.new_stream(self.rng)
+        self.coords = coords
+        self.id = world.new_id()
+        self.set_parts()
         self.alive = False
-        self.genome = None
-        self.create_graphic()
-        self.world.tag_bind(self.graphic_id, "<1>", self.describe)
-        self.world.tag_bind(self.graphic_id, "<Double-1>", self.describe_verbosely)
         Entity.N += 1
 
     def __str__(self):
         """Print name for entities."""
         return type(self).__name__ + str(self.id)
 
-    def create_graphic(self):
-        '''Create a graphic in the world for the Entity, and assign its id.'''
-        x, y = self.coords
-        self.graphic_id = self.world.create_oval(x - Entity.RADIUS, y - Entity.RADIUS,
-                                                 x + Entity.RADIUS, y + Entity.RADIUS,
-                                                 fill = self.color, outline = self.outline)
+    @property
+    def coords(self):
+        '''Coordinates of the center of the entity.'''
+        store, slot = self.store, self.slot
+        return store.x.item(slot), store.y.item(slot)
+
+    @coords.setter
+    def coords(self, coords):
+        self.store.x[self.slot], self.store.y[self.slot] = coords
 
     def overlapping_same_type(self):
         '''Does the Entity overlap with another Entity of the same type?'''
@@ -62,22 +92,50 @@ class Entity:
         """Print out a lot of information about the Entity."""
         self.describe(event)
 
-    def step(self):
-        """Take primitive actions, if any, and update the entity."""
+    def step(self, state=None):
+        """Take primitive actions, if any, and update the entity.
+        state is what the entity has sensed this step, if anything."""
         pass
 
     def destroy(self):
         """Needed for some subclasses."""
         pass
 
+    def renew(self, coords):
+        '''Make this dead entity into a new one at coords, just as its constructor would,
+        keeping the objects (stream, sensor, genome) it already has. See World.add_entity().'''
+        self.__init__(self.world, coords)
+
+    @classmethod
+    def restored(cls, world, entity_id, coords):
+        '''An entity of this class at coords, given a slot in world's store but otherwise
+        not constructed, for checkpoint.restore(), which fills in its columns and the
+        state of its stream. None of the constructor's random draws are made.'''
+        entity = cls.__new__(cls)
+        entity.world = world
+        entity.store = world.store
+        entity.store.add(entity)
+        entity.rng = random.Random()
+        entity.coords = coords
+        entity.id = entity_id
+        entity.set_parts()
+        return entity
+
+    def set_parts(self):
+        '''Set what the entity keeps outside the store: its food type, texture and solidity,
+        and more in subclasses. Done by the constructor, and by restored().'''
+        self.food = Entity
+        self.texture = 'empty'
+        self.solid = True
+
 class Clod(Entity):
     """A mineral."""
 
     color = 'blue'
 
-    def __init__(self, world, coords):
+    def set_parts(self):
         """Just for the texture."""
-        Entity.__init__(self, world, coords)
+        Entity.set_parts(self)
         self.texture = 'hard'
 
 class Fog(Entity):
@@ -85,8 +143,8 @@ class Fog(Entity):
 
     color = 'magenta'
 
-    def __init__(self, world, coords):
-        Entity.__init__(self, world, coords)
+    def set_parts(self):
+        Entity.set_parts(self)
         self.solid = False
 
 class Org(Entity):
@@ -101,30 +159,38 @@ class Org(Entity):
     LONGEVITY = 300
     """Number of steps an Org lives."""
 
+    @property
+    def strength(self):
+        '''Current strength.'''
+        return self.store.strength.item(self.slot)
+
+    @strength.setter
+    def strength(self, value):
+        self.store.set_strength(self.slot, value)
+
+    max_strength = column('max_strength', "Strength can't go above this.")
+    longevity = column('longevity', "Number of steps the org lives.")
+    age = column('age', "Number of time steps the org has been living.")
+
     def __init__(self, world, coords):
         Entity.__init__(self, world, coords)
         self.strength = Org.INIT_STRENGTH
         self.max_strength = Org.MAX_STRENGTH
         self.longevity = Org.LONGEVITY
         self.alive = True
-        # Number of time steps the org has been living
+        # The world ages the org each step and kills it when it runs out of
+        # strength or time (EntityStore.sweep)
+        self.mortal = True
         self.age = 0
 
-    def step(self):
-        # Age by one
-        Entity.step(self)
-        self.age += 1
-        if self.strength <= 0 or self.age >= self.longevity:
-            self.die()
-
     def die(self):
         """The org is scheduled to be lost from the world."""
         self.alive = False
 
     def change_strength(self, amount):
-        """Change the critter's strength by the amount (pos or neg)."""
+        """Change the critter's strength by the amount (pos or neg).
+        The world keeps it between 0 and max_strength (EntityStore.clamp_strength)."""
         self.strength += amount
-        self.strength = max([0, min([self.max_strength, self.strength])])
 
     def describe(self, event):
         '''Print out useful information about the Entity.'''
@@ -142,9 +208,12 @@ class Plasmoid(Org):
 
     def __init__(self, world, coords):
         Org.__init__(self, world, coords)
-        self.texture = 'soft'
         # Start with a random age so everyentity doesn't die at the same time
-        self.age = random.randint(0, 200)
+        self.age = self.rng.randint(0, 200)
+
+    def set_parts(self):
+        Org.set_parts(self)
+        self.texture = 'soft'
 
 class Critter(Org):
     """An animate entity; it can move, turn, and take actions."""
@@ -191,13 +260,25 @@ class Critter(Org):
     mouth_angle = 20
     """Opening of the critter's mouth."""
 
+    heading = column('heading', "Direction the critter faces, in degrees.")
+
+    sensor = None
+    """The critter's sensor; a recycled critter keeps the one it had, and its actions."""
+
     def __init__(self, world, coords, heading=None):
         """Initialize strength and heading in addition to location."""
-        self.heading = (heading if heading else random.randint(0, 360))
         Org.__init__(self, world, coords)
+        self.heading = heading if heading else self.rng.randint(0, 360)
+
+    def set_parts(self):
+        """Also make the critter's actions, sensor, brain and genome; a recycled critter
+        keeps its actions and sensor. When restoring, the brain's random weights and the
+        genome's bits are drawn from a stream whose state is replaced along with them."""
+        Org.set_parts(self)
         self.move_dist = Critter.MOVE_DIST
-        self.set_actions()
-        self.set_sensor()
+        if self.sensor is None:
+            self.set_actions()
+            self.set_sensor()
         self.set_brain()
         self.set_genome()
 
@@ -205,16 +286,6 @@ class Critter(Org):
         '''Assign the critter's genome, if it has one.  Overridden in subclasses.'''
         self.genome = None
 
-    def create_graphic(self):
-        """Override create_graphic in Entity, to make a body with a mouth."""
-        x, y = self.coords
-        self.graphic_id = self.world.create_arc(x - Entity.RADIUS, y - Entity.RADIUS,
-                                                x + Entity.RADIUS, y + Entity.RADIUS,
-                                                # A little mouth
-                                                start=self.heading + self.mouth_angle / 2,
-                                                extent= 360 - self.mouth_angle,
-                                                fill=self.color, outline=self.outline)
-
     def set_actions(self):
         """Set the critter's list of actions."""
         self.actions = [self.move, self.turn_right, self.turn_left, self.eat]
@@ -240,80 +311,70 @@ class Critter(Org):
         """Print out lots of information about the Entity."""
         self.brain.show_weights()
 
-    def destroy(self):
-        '''Really get rid of the critter.'''
-        self.sensor.destroy()
-
     def mouth_end(self):
         '''Coordinates of the point where the mouth opens.'''
-        return get_endpoint(self.coords[0], self.coords[1], self.heading, Entity.RADIUS)
+        x, y = self.coords
+        return endpoint(x, y, self.heading, Entity.RADIUS)
 
     def get_chewable(self):
         '''Entities overlapping with the critter.'''
         end_x, end_y = self.mouth_end()
         return self.world.get_overlapping((end_x - Critter.CHEW_RANGE, end_y - Critter.CHEW_RANGE ,
                                            end_x + Critter.CHEW_RANGE, end_y + Critter.CHEW_RANGE),
-                                          self.graphic_id)
+                                          self)
 
     ## What the critter does on every time step
     
-    def step(self):
-        """Select an action, execute it, and receive the reinforcement."""
-        # Mate with some probability with overlapping critters of the same species if your
-        # brain is genetic
-        if self.brain.genetic:
-            overlap = self.overlapping_same_type()
-            if overlap:
-                # Mate with overlapping Entity?  But not till the end of the time step.
-                if (overlap, self) not in self.world.to_mate and random.random() < self.mate_prob(overlap):
-                    self.world.to_mate.append((self, overlap))
-        # Sense
-        new_state = self.sensor.sense()
+    def step(self, state=None, action=None):
+        """Select an action, execute it, and receive the reinforcement, which is returned.
+        If state is given, it's what the critter's sensor has already sensed this step.
+        If action is given, the world has already decided for the critter (see BrainBank),
+        and it's up to the world to have the brain learn.
+        Critters with genetic brains that overlap others of their species may mate at
+        the end of the time step (see World.find_mates())."""
+        # Sense, unless the world has already sensed for the critter
+        new_state = self.sensor.sense() if state is None else state
+        if action is not None:
+            return self.act(action)
         # Decide (for evolution, this just "asks" the genome)
         new_action = self.brain.decide(new_state)
         # Act and receive a reinforcement
-        new_reinforcement = self.actions[new_action]()
+        new_reinforcement = self.act(new_action)
         # Here is where learning happens in the Q-learning version
         if self.brain.learning:
             self.brain.learner.learn(new_state, new_action, new_reinforcement)
-        # Change strength
-        self.change_strength(new_reinforcement)
-        # Age
-        Org.step(self)
+        return new_reinforcement
+
+    def act(self, action):
+        '''Execute the action with index action and change strength by the reinforcement,
+        which is returned.'''
+        reinforcement = self.actions[action]()
+        self.change_strength(reinforcement)
+        return reinforcement
 
     ## Actions that can be selected
 
     def move(self):
         '''Move x and y in the direction of heading by move_dist unless a Clod is hit.'''
-        x_dist, y_dist = xy_dist(self.heading, self.move_dist)
+        x_dist, y_dist = step_offset(self.heading, self.move_dist)
         x, y = self.world.adjust_coords(self.coords[0] + x_dist,
                                         self.coords[1] + y_dist)
-        x1 = max(0, x - Entity.RADIUS + Critter.BUMP_OFFSET)
-        y1 = max(0, y - Entity.RADIUS + Critter.BUMP_OFFSET)
-        x2 = min(self.world.width, x + Entity.RADIUS - Critter.BUMP_OFFSET)
-        y2 = min(self.world.height, y + Entity.RADIUS - Critter.BUMP_OFFSET)
-        if self.world.overlaps_with(x1, y1, x2, y2,
-                                    Clod):
+        # Would a square a little smaller than the body overlap a Clod there?
+        if self.world.clods.blocked(x, y, Entity.RADIUS - Critter.BUMP_OFFSET):
             # Fail to move and get punished for the collision with the entity
             return Critter.HARD_BUMP_COST
         else:
             # Go ahead and move
-            self.world.coords(self.graphic_id,
-                              x - Entity.RADIUS, y - Entity.RADIUS,
-                              x + Entity.RADIUS, y + Entity.RADIUS)
-            self.coords = x, y
-            self.sensor.move()
+            self.world.move_entity(self, (x, y))
             return Critter.MOVE_COST
 
     def turn(self, angle=False):
         """Change the critter's heading by angle."""
         if not angle:
-            self.heading = random.randint(0, 360)
+            heading = self.rng.randint(0, 360)
         else:
-            self.heading = (self.heading + angle) % 360
-        self.world.itemconfigure(self.graphic_id,
-                                 start = self.heading + self.mouth_angle / 2)
-        self.sensor.turn()
+            heading = (self.heading + angle) % 360
+        self.world.turn_entity(self, heading)
         return Critter.TURN_COST
 
     def turn_left(self):
@@ -331,6 +392,7 @@ class Critter(Org):
             if isinstance(c, self.food):
                 cost += Critter.FOOD_REWARD
                 c.die()
+                self.world.note('eaten', type(self))
         return cost
 
     def mate(self):
@@ -345,9 +407,9 @@ class Diskoid(Critter):
 
     color = 'pink'
 
-    def __init__(self, world, coords):
+    def set_parts(self):
         """Diskoids are like other critters, except for their food and their sensor."""
-        Critter.__init__(self, world, coords)
+        Critter.set_parts(self)
         self.food = Plasmoid
         self.texture = 'fuzzy'
 
@@ -364,8 +426,9 @@ class Diskoid(Critter):
                            self.sensor, learning=False, genetic=True)
 
     def set_genome(self):
-        '''Create the Diskoid's genome.'''
-        self.genome = Genome(self, self.sensor.get_n_states(), len(self.actions))
+        '''Create the Diskoid's genome, or give a recycled one new bits.'''
+        if self.genome is None:
+            self.genome = Genome(self, self.sensor.get_n_states(), len(self.actions))
         self.genome.initialize()
 
 class Ringoid(Critter):
@@ -373,21 +436,27 @@ class Ringoid(Critter):
 
     move_dist = 20
 
+    tabular = False
+    """Whether Ringoids learn Q values in a table (a TableBrain) rather than a network."""
+
     color = 'black'
     outline = 'orange'
 
     def __init__(self, world, coords):
         """Ringoids are learners rather than evolver."""
         Critter.__init__(self, world, coords)
-        self.food = Plasmoid
-        # If you want Ringoids to move faster
-#        self.move_dist = Ringoid.move_dist
-        self.texture = 'fuzzy'
         self.strength = 500
         self.max_strength = 10000
         # They're immortal
         self.longevity = 1000000000
 
+    def set_parts(self):
+        Critter.set_parts(self)
+        self.food = Plasmoid
+        # If you want Ringoids to move faster
+#        self.move_dist = Ringoid.move_dist
+        self.texture = 'fuzzy'
+
     def set_sensor(self):
         '''Feel sensor.'''
         self.sensor = Feel(self, self.world,
@@ -397,9 +466,12 @@ class Ringoid(Critter):
                            positional=True)
 
     def set_brain(self):
-        """Set the Ringoid's brain (neural network)."""
-        self.brain = Brain(self, self.sensor.get_n_state_features(), len(self.actions),
-                           self.sensor, learning=True, genetic=False)
+        """Set the Ringoid's brain (neural network, or table if tabular)."""
+        if self.tabular:
+            self.brain = TableBrain(self, self.sensor, len(self.actions))
+        else:
+            self.brain = Brain(self, self.sensor.get_n_state_features(), len(self.actions),
+                               self.sensor, learning=True, genetic=False)
 
 class Sensor:
 
@@ -411,6 +483,8 @@ class Sensor:
         self.n_features = len(features)
         self.symbolic = symbolic
         self.genetic = genetic
+        # Whether states are sensed as indices (set by brains that need them)
+        self.indexed = genetic
 
     def get_n_states(self):
         """Number of different states."""
@@ -424,40 +498,34 @@ class Sensor:
         """Get sensory information to be passed on to critter.
 
         If symbolic, return a list of strings.
-        If genetic, return an int.
+        If indexed (as for genetic sensors), return an int.
         """
         features = self.sense_symbolic()
         if self.symbolic:
             return features
-        elif self.genetic:
+        elif self.indexed:
             return self.symbolic2index(features)
         else:
             return self.symbolic2binary(features)
 
+    def sense_group(self, critters):
+        """Sense for each of critters, whose sensors are all like this one.
+        Returns a list of states, as sense() would for each critter."""
+        return [critter.sensor.sense() for critter in critters]
+
     def symbolic2index(self, symbolic):
         """Convert a list of strings to an int."""
         return 0
 
     def sense_symbolic(self):
         '''A list of features of entities sensed.'''
-        return [random.choice(self.features) for i in range(random.randint(0, 5))]
+        rng = self.critter.rng
+        return [rng.choice(self.features) for i in range(rng.randint(0, 5))]
 
     def symbolic2binary(self, symbols):
         '''Converts a string of symbols to a list of binary numbers.'''
         return [1 if f in symbols else 0 for f in self.features]
 
-    def move(self):
-        '''Move the graphical object(s) for the Sensor.'''
-        pass
-
-    def turn(self):
-        '''Turn the graphical object(s) for the Sensor.'''
-        pass
-
-    def destroy(self):
-        '''Get rid of the graphical object(s).'''
-        pass
-
 class Feel(Sensor):
     '''One or more feelers that can sense textures at their ends.'''
 
@@ -465,7 +533,7 @@ class Feel(Sensor):
 
     def __init__(self, critter, world, feeler_specs, textures,
                  positional=False, symbolic=False, genetic=False):
-        '''Create the feelers, set features to be textures.
+        '''Set up the feelers, set features to be textures.
 
         If positional is true, there are separate texture sensors for
         different positions.'''
@@ -473,57 +541,88 @@ class Feel(Sensor):
         # Feelers is a list of angles and lengths for each feeler
         self.positional = positional
         self.feeler_specs = feeler_specs
-        self.create_feelers()
 
     def get_n_states(self):
         """Number of different states, depending on positionality."""
-        return (self.n_features + 1) ** len(self.feelers) if self.positional \
+        return (self.n_features + 1) ** len(self.feeler_specs) if self.positional \
                else self.n_features + 1
 
     def get_n_state_features(self):
         """Number of different state features."""
-        return (self.n_features + 1) * len(self.feelers) if self.positional \
+        return (self.n_features + 1) * len(self.feeler_specs) if self.positional \
                else self.n_features + 1
 
     def feeler_coords(self, angle, length):
         '''Coordinates of feeler with given angle and length.'''
-        end_x, end_y = get_endpoint(self.critter.coords[0], self.critter.coords[1],
-                                    (self.critter.heading + angle) % 360, length)
-        return self.critter.coords[0], self.critter.coords[1], end_x, end_y
-
-    def create_feelers(self):
-        '''Create a Canvas object for each feeler, saving them in an attribute.'''
-        self.feelers = [self.create_feeler(specs) for specs in self.feeler_specs]
-
-    def create_feeler(self, angle_length):
-        '''Create a Canvas object for an angle and length.'''
-        coords = self.feeler_coords(*angle_length)
-        if self.world:
-            feeler_id = self.world.create_line(coords[0], coords[1], coords[2], coords[3],
-                                               fill=self.color)
-            self.world.tag_lower(feeler_id, self.critter.graphic_id)
-        else:
-            feeler_id = random.randint(1, 100)
-        return feeler_id
+        x, y = self.critter.coords
+        end_x, end_y = endpoint(x, y, (self.critter.heading + angle) % 360, length)
+        return x, y, end_x, end_y
 
     def sense_symbolic(self):
         '''List of Org textures felt by feelers; if positional, texture positions.'''
         found = []
-        for index, feeler in enumerate(self.feelers):
-            end_x, end_y = list(self.world.coords(feeler))[2:]
+        for index, spec in enumerate(self.feeler_specs):
+            end_x, end_y = self.feeler_coords(*spec)[2:]
             new = [self.feature_label(t.texture, index) \
                    for t in self.world.get_point_overlapping(end_x, end_y, None) \
                    if t.texture in self.features]
             if new:
                 if len(new) > 1:
-                    # Pick just one feature per feeler
-                    found.append(random.choice(new))
+                    # Pick just one feature per feeler, whatever order they were found in
+                    found.append(self.critter.rng.choice(sorted(new)))
                 else:
                     found.append(new[0])
             elif self.positional:
                 found.append(self.feature_label('none', index))
         return found
 
+    def sense_group(self, critters):
+        '''Sense for each of critters, whose feelers are all like these, in one pass.
+
+        All the feeler ends are computed together from the critters' headings, and the
+        textures under them are found together (see World.find_overlapping_points());
+        only positional, non-symbolic feelers are batched. Returns an array with the
+        state of each critter: an index, or a row of binary features.'''
+        if self.symbolic or not self.positional:
+            return Sensor.sense_group(self, critters)
+        store = self.world.store
+        slots = [critter.slot for critter in critters]
+        # Same geometry as feeler_coords(), for every critter and feeler
+        end_xs, end_ys = feeler_endpoints(store.x[slots], store.y[slots], store.heading[slots],
+                                          self.feeler_specs)
+        codes = self.feature_codes(end_xs, end_ys, critters)
+        nfeats = self.n_features + 1
+        if self.indexed:
+            # Same as symbolic2index()
+            return codes @ nfeats ** np.arange(len(self.feeler_specs))
+        # Same as symbolic2binary(): a one-hot group of nfeats bits per feeler
+        return (codes[:, :, None] == np.arange(nfeats)).reshape(len(critters), -1).astype(np.int64)
+
+    def feature_codes(self, end_xs, end_ys, critters):
+        '''Array of the positions in features of the textures felt at the feeler ends
+        end_xs, end_ys of critters (a row each), with n_features where nothing is felt.'''
+        features = self.features
+        positions = {feature: i for i, feature in enumerate(features)}
+        store = self.world.store
+        # The position of each texture code's texture in features, or -1
+        textures = np.array([positions.get(texture, -1) for texture in store.texture_names],
+                            dtype=np.int64)
+        points, slots = self.world.find_overlapping_points(end_xs, end_ys, 1)
+        felt = textures[store.texture[slots]]
+        points = points[felt >= 0]
+        felt = felt[felt >= 0]
+        codes = np.full(end_xs.size, self.n_features, dtype=np.int64)
+        hits = np.bincount(points, minlength=end_xs.size)
+        single = hits[points] == 1
+        codes[points[single]] = felt[single]
+        # Pick just one feature per feeler, as sense_symbolic() does, drawing from each
+        # critter's stream in feeler order
+        n_feelers = end_xs.shape[1]
+        for point in np.flatnonzero(hits > 1).tolist():
+            found = sorted(features[f] for f in felt[points == point].tolist())
+            codes[point] = positions[critters[point // n_feelers].rng.choice(found)]
+        return codes.reshape(end_xs.shape)
+
     def feature_label(self, label, position):
         '''A label to add to a symbolic feature list.'''
         return label + str(position) if self.positional else label
@@ -543,22 +642,3 @@ class Feel(Sensor):
                 if feat in symbol:
                     total += pos * mult
         return total
-
-    ## Methods to update the graphical objects
-    
-    def turn(self):
-        '''Adjust graphics when critter turns.  Overrides method in Sense.'''
-        for i, spec in zip(self.feelers, self.feeler_specs):
-            coords = self.feeler_coords(*spec)
-            self.world.coords(i, coords[0], coords[1], coords[2], coords[3])
-
-    def move(self):
-        '''Adjust graphics when critter moves.   Overrides method in Sense.'''
-        for i, spec in zip(self.feelers, self.feeler_specs):
-            coords = self.feeler_coords(*spec)
-            self.world.coords(i, coords[0], coords[1], coords[2], coords[3])
-
-    def destroy(self):
-        '''Get rid of the graphical object(s).'''
-        for f in self.feelers:
-            self.world.delete(f)
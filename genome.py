@@ -3,11 +3,60 @@
 ### Michael Gasser: gasser@cs.indiana.edu
 ###
 ### Genomes specifying actions given particular states.
+### The bits are packed eight to a byte in a NumPy uint8 array.
+### Random bits come from the stream of the animal the genome belongs to.
 
+import numpy as np
 from utils import *
-
-class Genome(list):
-    '''Class for genomes, which are lists of values.'''
+from arrays import *
+from rng import *
+
+def prefix_mask(n_bytes, n_bits):
+    '''Packed bit mask with the first n_bits of n_bytes bytes set.'''
+    mask = np.zeros(n_bytes, dtype=np.uint8)
+    mask[:n_bits >> 3] = 0xFF
+    if n_bits & 7:
+        mask[n_bits >> 3] = (0xFF << (8 - (n_bits & 7))) & 0xFF
+    return mask
+
+def prefix_masks(n_bytes, n_bits, points):
+    '''Packed bit masks (one row per point) with the first points[i] of n_bits set in row i.'''
+    return np.packbits(np.arange(n_bits) < np.asarray(points)[:, None], axis=1)[:, :n_bytes]
+
+def mutation_positions(n_bits, rng):
+    '''Sorted array of the positions among n_bits to flip, each with probability MUTATION,
+    drawn from the random.Random rng. Rather than testing every bit, skip ahead to the
+    next bit to flip; the gaps between flipped bits are geometrically distributed.'''
+    p = Genome.MUTATION
+    if p <= 0 or n_bits <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(n_bits)
+    expected = n_bits * p
+    chunk = int(expected + 4 * math.sqrt(expected)) + 16
+    positions = []
+    last = -1
+    while last < n_bits:
+        # Geometric gaps (1 or more) from uniforms, by inverting the distribution
+        gaps = np.floor(np.log1p(-uniforms(rng, chunk)) / math.log1p(-p)).astype(np.int64) + 1
+        flips = last + np.cumsum(gaps)
+        positions.append(flips[flips < n_bits])
+        last = flips[-1]
+    return np.concatenate(positions)
+
+def flip_bits(bits, positions, n_bits):
+    '''Flip the bits at positions in the packed rows of bits, each row being n_bits long,
+    treating positions as indices into the rows laid end to end.'''
+    rows, columns = np.divmod(positions, n_bits)
+    masks = (0x80 >> (columns & 7)).astype(np.uint8)
+    np.bitwise_xor.at(bits.reshape(-1, bits.shape[-1]), (rows, columns >> 3), masks)
+
+class Genome:
+    '''Class for genomes, which are strings of bits.
+
+    The best action for each state is compiled into a policy table the first time
+    it's needed. Anything that changes the bits (initialize, mutate, crossover, or
+    assigning bits) must call invalidate() so the table is compiled again.'''
 
     evolve = False
 
@@ -23,28 +72,68 @@ class Genome(list):
         self.n_states = n_states
         self.n_actions = n_actions
         self.length = n_actions * n_states * Genome.BITS_PER_VALUE
+        # Bits packed into bytes, first bit in the high bit of the first byte;
+        # the unused bits at the end of the last byte are always 0
+        self.bits = np.zeros((self.length + 7) >> 3, dtype=np.uint8)
+        # Best action index for each state, compiled from the bits when needed
+        self.policy = None
+
+    def __len__(self):
+        '''Number of bits in the genome.'''
+        return self.length
+
+    def __getitem__(self, index):
+        '''The bit at index, as a bool.'''
+        if not 0 <= index < self.length:
+            raise IndexError('genome index out of range')
+        return bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
 
     def initialize(self):
-        '''Set the length and random bits in the genome.'''
-        for a in range(self.length):
-            self.append(random.random() < .5)
+        '''Set random bits in the genome.'''
+        self.bits = random_bytes(self.animal.rng, len(self.bits))
+        self.bits &= prefix_mask(len(self.bits), self.length)
+        self.invalidate()
+
+    def to_bytes(self):
+        '''The packed bits, as bytes.'''
+        return self.bits.tobytes()
+
+    def from_bytes(self, data):
+        '''Set the bits from packed bytes like those from to_bytes().'''
+        bits = np.frombuffer(data, dtype=np.uint8)
+        if len(bits) != len(self.bits):
+            raise ValueError('genome needs %d bytes, not %d' % (len(self.bits), len(bits)))
+        self.bits = bits & prefix_mask(len(self.bits), self.length)
+        self.invalidate()
+
+    def invalidate(self):
+        '''Note that the bits have changed, so the policy table must be compiled again.'''
+        self.policy = None
+
+    def compile(self):
+        '''Compile the table of best actions for all states.'''
+        values = np.array(self.get_values()).reshape(self.n_states, self.n_actions)
+        # argmax picks the first of tied values, like get_best_action() always has
+        self.policy = values.argmax(axis=1).tolist()
 
     def copy(self, animal):
         '''Make a copy of this Genome, but for a different animal. If Genome.evolve
         is False, just copy the number of bits, not the actual values.'''
         g = Genome(animal, self.n_states, self.n_actions)
         if Genome.evolve:
-            for a in range(g.length):
-                g.append(self[a])
+            g.bits = self.bits.copy()
+            # Same bits, so the same policy
+            g.policy = self.policy
             return g
         g.initialize()
         return g
 
     def mutate(self):
         '''With probability MUTATION, flip the bits in the Genome.'''
-        for a in range(len(self)):
-            if random.random() < Genome.MUTATION:
-                self[a] = not self[a]
+        positions = mutation_positions(self.length, self.animal.rng)
+        if len(positions):
+            flip_bits(self.bits, positions, self.length)
+            self.invalidate()
 
     def crossover(self, mate_genome, offspring1, offspring2):
         '''Perform crossover between this genome and mate_genome,
@@ -54,22 +143,76 @@ class Genome(list):
         genome2 = mate_genome.copy(offspring2)
         offspring1.genome = genome1
         offspring2.genome = genome2
-        if random.random() < Genome.CROSSOVER:
+        # Whether and where to cross over comes from the first offspring's stream
+        rng = offspring1.rng
+        if rng.random() < Genome.CROSSOVER:
             # Swap everything up to the crossover point
-            crossover_point = random.randint(1, self.length - 1)
-            genome1[:crossover_point] = mate_genome[:crossover_point]
-            genome2[:crossover_point] = self[:crossover_point]
+            crossover_point = rng.randint(1, self.length - 1)
+            mask = prefix_mask(len(self.bits), crossover_point)
+            genome1.bits = (mate_genome.bits & mask) | (genome1.bits & ~mask)
+            genome2.bits = (self.bits & mask) | (genome2.bits & ~mask)
+            genome1.invalidate()
+            genome2.invalidate()
         # Mutate the crossed-over genomes
         genome1.mutate()
         genome2.mutate()
 
+    @staticmethod
+    def crossover_all(genomes1, genomes2, offspring1, offspring2):
+        '''Do what crossover() does for every pair genomes1[i], genomes2[i], giving the
+        genomes to offspring1[i] and offspring2[i], which already have genomes of the
+        same size. The genomes are stacked into matrices with a row for each pair, and
+        crossover and mutation are done with mask operations on the whole matrices.
+        The random draws come from the offsprings' streams, just as in crossover().'''
+        length = genomes1[0].length
+        n_pairs = len(genomes1)
+        parents1 = np.stack([g.bits for g in genomes1])
+        parents2 = np.stack([g.bits for g in genomes2])
+        n_bytes = parents1.shape[1]
+        if Genome.evolve:
+            children1 = parents1.copy()
+            children2 = parents2.copy()
+        else:
+            # Just the number of bits, not the actual values, as in copy()
+            children1 = np.stack([random_bytes(o.rng, n_bytes) for o in offspring1])
+            children2 = np.stack([random_bytes(o.rng, n_bytes) for o in offspring2])
+            children1 &= prefix_mask(n_bytes, length)
+            children2 &= prefix_mask(n_bytes, length)
+        # Swap everything up to the crossover point, in the pairs that cross over
+        points = []
+        for o in offspring1:
+            rng = o.rng
+            points.append(rng.randint(1, length - 1) if rng.random() < Genome.CROSSOVER else 0)
+        masks = prefix_masks(n_bytes, length, points)
+        children1 = (parents2 & masks) | (children1 & ~masks)
+        children2 = (parents1 & masks) | (children2 & ~masks)
+        # Mutate all of the crossed-over genomes at once, each with its own positions
+        children = np.concatenate([children1, children2])
+        everyone = list(offspring1) + list(offspring2)
+        positions = [mutation_positions(length, o.rng) + row * length \
+                     for row, o in enumerate(everyone)]
+        flip_bits(children, np.concatenate(positions), length)
+        for offspring, bits in zip(everyone, children):
+            offspring.genome.bits = bits
+        Genome.compile_all([offspring.genome for offspring in everyone])
+
+    @staticmethod
+    def compile_all(genomes):
+        '''Compile the policy tables of genomes, which are all the same size, at once.'''
+        genome = genomes[0]
+        values = bit_group_values(np.stack([g.bits for g in genomes]), genome.length,
+                                  Genome.BITS_PER_VALUE)
+        policies = values.reshape(len(genomes), genome.n_states, genome.n_actions).argmax(axis=2)
+        for g, policy in zip(genomes, policies.tolist()):
+            g.policy = policy
+
     def get_groups(self):
-        '''Sublists representing q-values.'''
-        return [self[start:start+Genome.BITS_PER_VALUE] for start in range(0, self.length, Genome.BITS_PER_VALUE)]
+        '''Array of bits with a row for each q-value.'''
+        return np.unpackbits(self.bits)[:self.length].reshape(-1, Genome.BITS_PER_VALUE)
 
     def get_values(self):
         '''List of values represented by genome.'''
-        return [self.to_value(ls) for ls in self.get_groups()]
+        return bit_group_values(self.bits, self.length, Genome.BITS_PER_VALUE).tolist()
 
     def get_state_values(self, state_index):
         '''List of values for state with index state_index.'''
@@ -77,10 +220,10 @@ class Genome(list):
         return self.get_values()[start:(start + self.n_actions)]
 
     def get_best_action(self, state_index):
-        '''Return the index of the best action for the given state.'''
-        state_values = self.get_state_values(state_index)
-        highest = max(state_values)
-        return state_values.index(max(state_values))
+        '''Return the index of the best action for the given state, from the policy table.'''
+        if self.policy is None:
+            self.compile()
+        return self.policy[state_index]
 
     def get_value(self, state_index, action_index):
         '''Value for state-action pair.'''
@@ -0,0 +1,69 @@
+### Tables of the offsets that get_endpoint() and xy_dist() (in utils.py) give
+### for each integer heading, made once for each distance, so that moving and
+### finding mouths and feeler ends are lookups rather than trigonometry.
+### Headings run from 0 to 360 (new critters may face 360). The tables are
+### computed with those functions, so lookups give exactly the same numbers.
+
+import numpy as np
+from utils import *
+
+HEADINGS = 361
+"""Number of headings in each table."""
+
+ENDPOINT_TABLES = {}
+"""x and y offset lists of get_endpoint() at each heading, indexed by distance."""
+
+STEP_TABLES = {}
+"""x and y offset lists of xy_dist() at each heading, indexed by distance."""
+
+ARRAY_TABLES = {}
+"""get_endpoint() offsets as a HEADINGS x 2 array, indexed by distance."""
+
+def endpoint_offsets(dist):
+    '''Lists of the x and y offsets from a point to the end of a line of length dist,
+    for each heading.'''
+    table = ENDPOINT_TABLES.get(dist)
+    if table is None:
+        ends = [get_endpoint(0, 0, heading, dist) for heading in range(HEADINGS)]
+        table = ENDPOINT_TABLES[dist] = [x for x, y in ends], [y for x, y in ends]
+    return table
+
+def step_offsets(dist):
+    '''Lists of the x and y distances covered moving dist, for each heading.'''
+    table = STEP_TABLES.get(dist)
+    if table is None:
+        steps = [xy_dist(heading, dist) for heading in range(HEADINGS)]
+        table = STEP_TABLES[dist] = [x for x, y in steps], [y for x, y in steps]
+    return table
+
+def endpoint_array(dist):
+    '''Array of the x and y offsets (a row per heading) for lines of length dist.'''
+    table = ARRAY_TABLES.get(dist)
+    if table is None:
+        table = ARRAY_TABLES[dist] = np.array(endpoint_offsets(dist), dtype=np.int64).T
+    return table
+
+def endpoint(x, y, heading, dist):
+    '''Same as get_endpoint(x, y, heading, dist), for an integer heading 0 ... 360.'''
+    xs, ys = endpoint_offsets(dist)
+    return x + xs[heading], y + ys[heading]
+
+def step_offset(heading, dist):
+    '''Same as xy_dist(heading, dist), for an integer heading 0 ... 360.'''
+    xs, ys = step_offsets(dist)
+    return xs[heading], ys[heading]
+
+def endpoints(xs, ys, headings, dist):
+    '''Arrays of the ends of lines of length dist from points xs, ys in directions
+    headings (arrays of the same shape).'''
+    offsets = endpoint_array(dist)[headings]
+    return xs + offsets[..., 0], ys + offsets[..., 1]
+
+def feeler_endpoints(xs, ys, headings, specs):
+    '''Arrays of the ends of feelers with specs (angle, length) on bodies at xs, ys
+    facing headings, with a row per body and a column per feeler.'''
+    end_xs = np.empty((len(xs), len(specs)), dtype=np.int64)
+    end_ys = np.empty((len(xs), len(specs)), dtype=np.int64)
+    for j, (angle, length) in enumerate(specs):
+        end_xs[:, j], end_ys[:, j] = endpoints(xs, ys, (headings + angle) % 360, length)
+    return end_xs, end_ys
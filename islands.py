@@ -0,0 +1,202 @@
+### Island-model evolution. Several worlds (islands) evolve at the same time in
+### separate processes, possibly on different hosts. Every so many steps each
+### island sends the genomes of its strongest genetic critters to a coordinator
+### over a socket, and the coordinator passes them on to other islands according
+### to a migration topology; arriving genomes replace those of the weakest
+### critters of the same species. Genomes travel as their packed bytes.
+###
+### Messages are pickled, so anyone who can connect with the key can run code
+### on the coordinator or an island. A local run makes up a random key; across
+### hosts, every process must be given the same secret key, and the coordinator
+### won't listen on an address other hosts can reach without one.
+###
+### Local run:     python islands.py --islands 4
+### Across hosts:  export ISLANDS_AUTHKEY=<secret>   (on every host)
+###                python islands.py --islands 4 --host 0.0.0.0 --port 6000 --remote
+###                python islands.py --connect coordinator-host:6000   (on each host)
+
+import argparse, ipaddress, json, multiprocessing, os, socket, sys
+from multiprocessing.connection import Listener, Client
+from batch import *
+
+AUTHKEY_VARIABLE = 'ISLANDS_AUTHKEY'
+"""Environment variable with the secret key, if it isn't given with --authkey."""
+
+UNSUPPORTED = ('telemetry', 'profile')
+"""Config keys (see batch.py) that islands don't act on."""
+
+ENTITIES = {'Diskoid': {'init': 30, 'min': 0, 'max': 50},
+            'Plasmoid': {'init': 75, 'min': 75, 'max': 80}}
+"""Default population on each island; Diskoids are the critters that evolve."""
+
+## Migration topologies: for n islands, a list of the islands each island receives from
+
+def ring(n):
+    '''Each island receives from the one before it.'''
+    return [[(i - 1) % n] if n > 1 else [] for i in range(n)]
+
+def fully_connected(n):
+    '''Each island receives from all the others.'''
+    return [[j for j in range(n) if j != i] for i in range(n)]
+
+TOPOLOGIES = {'ring': ring, 'full': fully_connected}
+
+## What islands do
+
+def genetic_critters(world):
+    '''Lists of the critters with genomes in world, indexed by species name.'''
+    species = {}
+    for typ, members in world.registry.items():
+        critters = [c for c in members.values() if isinstance(c, Critter) and c.genome is not None]
+        if critters:
+            species[typ.__name__] = critters
+    return species
+
+def emigrants(world, n):
+    '''The genomes of the n strongest genetic critters of each species in world, as lists
+    of (strength, n_states, n_actions, bytes) indexed by species name.'''
+    found = {}
+    for name, critters in genetic_critters(world).items():
+        strongest = sorted(critters, key=lambda c: c.strength, reverse=True)[:n]
+        found[name] = [(c.strength, c.genome.n_states, c.genome.n_actions, c.genome.to_bytes()) \
+                       for c in strongest]
+    return found
+
+def settle(world, immigrants):
+    '''Give the immigrant genomes (like those from emigrants()) to the weakest
+    critters of the same species in world.'''
+    for name, critters in genetic_critters(world).items():
+        arrivals = immigrants.get(name, [])
+        weakest = sorted(critters, key=lambda c: c.strength)
+        for critter, (strength, n_states, n_actions, data) in zip(weakest, arrivals):
+            if (n_states, n_actions) == (critter.genome.n_states, critter.genome.n_actions):
+                critter.genome.from_bytes(data)
+
+def get_authkey(text=None):
+    '''The secret key as bytes: text if it's given, otherwise the value of the
+    AUTHKEY_VARIABLE environment variable, or None if neither is set.'''
+    text = text or os.environ.get(AUTHKEY_VARIABLE)
+    return text.encode() if text else None
+
+def is_loopback(host):
+    '''Can only this host reach host?'''
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+def island(address, authkey):
+    '''Connect to the coordinator at address, and run the world it asks for, trading
+    genomes with it every interval steps. Sends back the statistics at the end.'''
+    with Client(address, authkey=authkey) as conn:
+        orders = conn.recv()
+        world = make_world(orders['config'])
+        for epoch in range(orders['epochs']):
+            for s in range(orders['interval']):
+                world.step()
+            conn.send(emigrants(world, orders['migrants']))
+            settle(world, conn.recv())
+        conn.send({'config': orders['config'], 'steps': world.steps, 'stats': world.get_stats()})
+
+## What the coordinator does
+
+def migrate(outgoing, sources, n):
+    '''The immigrants for an island that receives from the islands in sources, given the
+    emigrants from every island: the n strongest of each species.'''
+    arriving = {}
+    for source in sources:
+        for name, genomes in outgoing[source].items():
+            arriving.setdefault(name, []).extend(genomes)
+    return {name: sorted(genomes, key=lambda g: g[0], reverse=True)[:n] \
+            for name, genomes in arriving.items()}
+
+def run_islands(configs, topology='ring', interval=100, migrants=2, epochs=10,
+                address=('localhost', 0), local=True, authkey=None):
+    '''Evolve an island for each of configs (see batch.py), exchanging migrants
+    genomes per species every interval steps, epochs times, so each island runs
+    interval * epochs steps. topology is the name of one in TOPOLOGIES or a
+    function like them. If local is True, the islands are started here as
+    processes; otherwise wait for islands to connect to address. authkey is the
+    secret key; it's required unless the islands are local and address is a
+    loopback address, in which case a random one is used.
+    Returns the results for the islands in the order they connected.'''
+    if not authkey:
+        if not local or not is_loopback(address[0]):
+            raise ValueError('a secret authkey is required for islands on other hosts')
+        authkey = os.urandom(32)
+    steps = interval * epochs
+    for config in configs:
+        if config.get('steps', steps) != steps:
+            raise ValueError('islands run interval * epochs = %d steps, not %d' %
+                             (steps, config['steps']))
+        for key in UNSUPPORTED:
+            if config.get(key):
+                raise ValueError("islands don't support the config key " + repr(key))
+    sources = (TOPOLOGIES[topology] if isinstance(topology, str) else topology)(len(configs))
+    configs = [complete_config(dict({'entities': ENTITIES}, **config, steps=steps)) \
+               for config in configs]
+    processes = []
+    with Listener(address, authkey=authkey) as listener:
+        print('Coordinator listening on', listener.address, file=sys.stderr)
+        if local:
+            for config in configs:
+                process = multiprocessing.Process(target=island, args=(listener.address, authkey))
+                process.start()
+                processes.append(process)
+        conns = [listener.accept() for config in configs]
+        try:
+            for conn, config in zip(conns, configs):
+                config['entities'] = entity_names(config['entities'])
+                conn.send({'config': config, 'interval': interval,
+                           'migrants': migrants, 'epochs': epochs})
+            for epoch in range(epochs):
+                outgoing = [conn.recv() for conn in conns]
+                for conn, island_sources in zip(conns, sources):
+                    conn.send(migrate(outgoing, island_sources, migrants))
+            results = [conn.recv() for conn in conns]
+        finally:
+            for conn in conns:
+                conn.close()
+    for process in processes:
+        process.join()
+    return results
+
+def parse_address(text):
+    '''A (host, port) pair from "host:port".'''
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evolve worlds as islands that trade genomes.')
+    parser.add_argument('--connect', type=parse_address, default=None,
+                        help='run one island for the coordinator at host:port')
+    parser.add_argument('--islands', type=int, default=4)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--topology', choices=sorted(TOPOLOGIES), default='ring')
+    parser.add_argument('--interval', type=int, default=100)
+    parser.add_argument('--migrants', type=int, default=2)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--remote', action='store_true',
+                        help="don't start islands here; wait for them to connect")
+    parser.add_argument('--authkey', default=None,
+                        help='secret key shared by coordinator and islands (or set %s)' %
+                        AUTHKEY_VARIABLE)
+    args = parser.parse_args()
+    authkey = get_authkey(args.authkey)
+    if args.connect:
+        if not authkey:
+            parser.error('--connect needs a secret key: --authkey or ' + AUTHKEY_VARIABLE)
+        island(args.connect, authkey)
+    else:
+        if not authkey and (args.remote or not is_loopback(args.host)):
+            parser.error('listening for other hosts needs a secret key: --authkey or ' +
+                         AUTHKEY_VARIABLE)
+        config = {'evolve': True, 'eta': 0.05}
+        results = run_islands(replicates(config, args.islands, args.first_seed),
+                              topology=args.topology, interval=args.interval,
+                              migrants=args.migrants, epochs=args.epochs,
+                              address=(args.host, args.port), local=not args.remote,
+                              authkey=authkey)
+        print(json.dumps(results, indent=1))
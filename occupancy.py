@@ -0,0 +1,93 @@
+### A raster of the toroidal world, with a count for every integer point of
+### the bodies (circles of one radius) that a square centered there would
+### overlap, for squares of each size asked about. The world keeps one for
+### its Clods, which never move, so asking whether a critter would bump into
+### a Clod, or whether a new entity can go somewhere, is a single lookup, and
+### the points where new entities can go are known without trying them.
+
+import numpy as np
+
+class OccupancyGrid:
+    '''Counts of the bodies overlapping squares centered at each point of the world.'''
+
+    def __init__(self, width, height, radius):
+        '''An empty grid for a width x height torus and bodies with the given radius.'''
+        self.width = width
+        self.height = height
+        self.radius = radius
+        # Centers of the bodies in the grid, with how many are at each
+        self.bodies = {}
+        # Counts for each point, indexed by the half-size of the squares
+        self.grids = {}
+        # Indices of the free points in each region, indexed by (half, x_lo, x_hi, y_lo, y_hi)
+        self.free = {}
+
+    def __len__(self):
+        '''Number of bodies in the grid.'''
+        return sum(self.bodies.values())
+
+    def stamp(self, half):
+        '''The offsets of the points covered by squares of half-size half overlapping a
+        body centered at 0,0, and a mask of which of them are.'''
+        reach = half + self.radius
+        offsets = np.arange(-reach, reach + 1)
+        # Distance from the center of the body to the nearest point of the square, as
+        # World.find_overlapping() measures it
+        d = np.maximum(np.abs(offsets) - half, 0)
+        return offsets, d[:, None] * d[:, None] + d * d <= self.radius * self.radius
+
+    def change(self, grid, half, x, y, n):
+        '''Add n to the counts in grid of squares of half-size half overlapping a body at x,y.'''
+        offsets, mask = self.stamp(half)
+        xs = (x + offsets) % self.width
+        ys = (y + offsets) % self.height
+        # Points may repeat when the stamp is wider than the world
+        np.add.at(grid, np.ix_(xs, ys), n * mask)
+
+    def grid(self, half):
+        '''The counts for squares of half-size half, made from the bodies if necessary.'''
+        grid = self.grids.get(half)
+        if grid is None:
+            grid = self.grids[half] = np.zeros((self.width, self.height), dtype=np.int32)
+            for (x, y), n in self.bodies.items():
+                self.change(grid, half, x, y, n)
+        return grid
+
+    def add(self, x, y, n=1):
+        '''Put n bodies at x,y (negative n to take them out).'''
+        x, y = int(x), int(y)
+        count = self.bodies.get((x, y), 0) + n
+        if count:
+            self.bodies[x, y] = count
+        else:
+            del self.bodies[x, y]
+        for half, grid in self.grids.items():
+            self.change(grid, half, x, y, n)
+        self.free = {}
+
+    def remove(self, x, y):
+        '''Take a body at x,y out of the grid.'''
+        self.add(x, y, -1)
+
+    def blocked(self, x, y, half):
+        '''Does a square of half-size half centered at integer point x,y overlap a body?'''
+        if not self.bodies:
+            return False
+        return self.grid(half).item(x % self.width, y % self.height) > 0
+
+    def free_indices(self, half, x_lo, x_hi, y_lo, y_hi):
+        '''Array of the indices (row by row in x, as free_points() decodes them) of the
+        points in x_lo ... x_hi, y_lo ... y_hi (inclusive) where a square of half-size
+        half overlaps no body.'''
+        key = half, x_lo, x_hi, y_lo, y_hi
+        indices = self.free.get(key)
+        if indices is None:
+            indices = self.free[key] = \
+                np.flatnonzero(self.grid(half)[x_lo:x_hi + 1, y_lo:y_hi + 1] == 0)
+        return indices
+
+    def free_points(self, indices, x_lo, y_lo, y_hi):
+        '''Arrays of the x and y coordinates of the points of a region with the given
+        indices, like those free_indices() returns.'''
+        x, y = np.divmod(indices, y_hi - y_lo + 1)
+        return x_lo + x, y_lo + y
@@ -0,0 +1,114 @@
+### Timers for the phases of World.step() and counters for the calls it makes.
+### A Profiler attached to a world times each phase of every step (topping up
+### the populations, sensing, deciding, acting, learning, the death sweep and
+### mating) and counts the spatial queries made (a batched query counts once
+### for each point or entity it asks about) and the Canvas calls the view
+### makes. Detached, it costs nothing: the world only checks whether it has a
+### profiler a few times per step, and the counting wrappers are removed.
+###
+###   profiler = Profiler().attach(world)
+###   world.run(100)      # show_stats() also shows the profile
+###   profiler.report()   # or as a dict
+
+import time
+import numpy as np
+
+def n_points(xs, *args):
+    '''Number of points asked about by a batched query with x coordinates xs.'''
+    return np.size(xs)
+
+class Profiler:
+    '''Times the phases of a world's steps and counts calls made during them.'''
+
+    CANVAS_CALLS = ('create_arc', 'create_oval', 'create_line', 'coords', 'itemconfigure',
+                    'delete', 'tag_bind', 'tag_lower')
+    """Canvas methods counted as canvas calls."""
+
+    def __init__(self):
+        '''Start with nothing timed or counted.'''
+        self.world = None
+        # Wrapped methods: (object, name) pairs
+        self.wrapped = []
+        self.reset()
+
+    def reset(self):
+        '''Forget all times and counts.'''
+        # Seconds spent in each phase, indexed by phase name, in the order first seen
+        self.times = {}
+        # Number of calls of each kind, indexed by name
+        self.counts = {}
+        self.steps = 0
+        # The phase being timed and when it started
+        self.phase = None
+        self.start = 0.0
+
+    def attach(self, world):
+        '''Start profiling world's steps, and return the profiler.'''
+        self.world = world
+        world.profiler = self
+        self.wrap(world, 'find_overlapping', 'spatial_queries')
+        # The batched queries count once for each point or entity
+        self.wrap(world, 'find_overlapping_points', 'spatial_queries', n_points)
+        self.wrap(world, 'overlapping_pairs', 'spatial_queries', n_points)
+        self.wrap(world.clods, 'blocked', 'spatial_queries')
+        if world.view:
+            for name in Profiler.CANVAS_CALLS:
+                self.wrap(world.view, name, 'canvas_calls')
+        return self
+
+    def detach(self):
+        '''Stop profiling, putting back the methods that were wrapped.'''
+        for obj, name in self.wrapped:
+            delattr(obj, name)
+        self.wrapped = []
+        if self.world and self.world.profiler is self:
+            self.world.profiler = None
+        self.world = None
+
+    def wrap(self, obj, name, counter, size=None):
+        '''Count calls of obj's method name as counter, until detached. If size is given,
+        each call counts as size(*args) calls.'''
+        method = getattr(obj, name)
+        counts = self.counts
+        counts.setdefault(counter, 0)
+        def counted(*args, **kwargs):
+            counts[counter] += size(*args) if size else 1
+            return method(*args, **kwargs)
+        setattr(obj, name, counted)
+        self.wrapped.append((obj, name))
+
+    def mark(self, phase):
+        '''End the current phase, if any, and start timing phase; None ends the step.'''
+        now = time.perf_counter()
+        if self.phase:
+            self.times[self.phase] = self.times.get(self.phase, 0.0) + now - self.start
+        self.phase = phase
+        self.start = now
+        if phase is None:
+            self.steps += 1
+
+    def count(self, name, n=1):
+        '''Add n to a counter.'''
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def report(self):
+        '''Times and counts so far, as a dict with 'steps', 'phases' and 'counts'. Each
+        phase has its total seconds, seconds per step and share of the step time; each
+        counter its total and number per step.'''
+        steps = self.steps or 1
+        total = sum(self.times.values()) or 1.0
+        return {'steps': self.steps,
+                'phases': {phase: {'total': t, 'per_step': t / steps, 'share': t / total} \
+                           for phase, t in self.times.items()},
+                'counts': {name: {'total': n, 'per_step': n / steps} \
+                           for name, n in self.counts.items()}}
+
+    def show(self):
+        '''Print the times and counts so far.'''
+        report = self.report()
+        print('PROFILE OF', report['steps'], 'STEPS')
+        for phase, t in report['phases'].items():
+            print('  {:10} {:10.3f} ms/step {:6.1f}%'.format(phase, 1000 * t['per_step'],
+                                                            100 * t['share']))
+        for name, n in report['counts'].items():
+            print('  {:16} {:10.1f} /step'.format(name, n['per_step']))
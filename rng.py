@@ -0,0 +1,39 @@
+### Independent random number streams derived from a world's seed.
+### Every entity gets its own stream, numbered by the order in which the
+### world created it, and the world has its own streams for what it does
+### (placing new entities). A draw from one stream never changes another,
+### so what happens to an entity doesn't depend on the order in which the
+### entities are stepped, or on which thread or process steps them.
+
+import random
+import numpy as np
+
+ENTITY = 0
+"""Key for entity streams; the entity's number follows it."""
+WORLD = 1
+"""Key for the world's own stream."""
+PLACEMENT = 2
+"""Key for the world's stream for placing entities in bulk."""
+REPLAY = 3
+"""Key for the streams of shared replay buffers; the species' kind code follows it."""
+
+def stream_seed(seed, *key):
+    '''An integer seed for the stream with key (a tuple of ints) in the tree for seed.'''
+    words = np.random.SeedSequence(seed, spawn_key=key).generate_state(4, np.uint64)
+    return int.from_bytes(words.tobytes(), 'little')
+
+def stream(seed, *key):
+    '''A random.Random for the stream with key in the tree for seed.'''
+    return random.Random(stream_seed(seed, *key))
+
+def array_stream(seed, *key):
+    '''A NumPy Generator for the stream with key in the tree for seed.'''
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=key)))
+
+def uniforms(rng, n):
+    '''Array of n floats in [0, 1) drawn from the random.Random rng all at once.'''
+    return (np.frombuffer(rng.randbytes(8 * n), dtype=np.uint64) >> np.uint64(11)) * 2.0 ** -53
+
+def random_bytes(rng, n):
+    '''Writable array of n random bytes drawn from the random.Random rng.'''
+    return np.frombuffer(rng.randbytes(n), dtype=np.uint8).copy()
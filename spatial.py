@@ -0,0 +1,70 @@
+### A uniform grid of cells over the toroidal world, each cell holding the
+### entities whose centers fall inside it. Queries only look at the cells
+### near a region, wrapping around the edges of the world.
+
+class SpatialHash:
+    '''Entities bucketed by the grid cell their center is in.'''
+
+    def __init__(self, width, height, cell_size):
+        '''Divide a width x height torus into cells at least cell_size on a side.'''
+        self.width = width
+        self.height = height
+        self.cols = max(1, int(width // cell_size))
+        self.rows = max(1, int(height // cell_size))
+        # Cells divide the world evenly, so wrapping a cell index wraps the coordinates
+        self.cell_width = width / self.cols
+        self.cell_height = height / self.rows
+        # Entities in each cell, indexed by entity id; cell index is col * rows + row
+        self.cells = [{} for c in range(self.cols * self.rows)]
+        # Cell index of each entity, indexed by entity id
+        self.where = {}
+
+    def __len__(self):
+        '''Number of entities in the grid.'''
+        return len(self.where)
+
+    def cell_index(self, x, y):
+        '''Index of the cell containing the point x,y.'''
+        return (int(x // self.cell_width) % self.cols) * self.rows + \
+               int(y // self.cell_height) % self.rows
+
+    def insert(self, entity):
+        '''Add an entity to the cell for its coordinates.'''
+        index = self.cell_index(*entity.coords)
+        self.cells[index][entity.id] = entity
+        self.where[entity.id] = index
+
+    def remove(self, entity):
+        '''Take an entity out of the grid.'''
+        del self.cells[self.where.pop(entity.id)][entity.id]
+
+    def move(self, entity):
+        '''Update the cell of an entity whose coordinates have changed.'''
+        index = self.cell_index(*entity.coords)
+        old = self.where[entity.id]
+        if index != old:
+            del self.cells[old][entity.id]
+            self.cells[index][entity.id] = entity
+            self.where[entity.id] = index
+
+    def wrapped_range(self, lo, hi, size, n):
+        '''Indices of the cells of the given size covering lo..hi, wrapped around n cells.'''
+        first = int(lo // size)
+        last = int(hi // size)
+        if last - first + 1 >= n:
+            return range(n)
+        return [i % n for i in range(first, last + 1)]
+
+    def near(self, x1, y1, x2, y2):
+        '''Entities whose centers are in the cells covering the region x1, y1, x2, y2.'''
+        rows = self.rows
+        cells = self.cells
+        row_indices = self.wrapped_range(y1, y2, self.cell_height, rows)
+        found = []
+        for col in self.wrapped_range(x1, x2, self.cell_width, self.cols):
+            base = col * rows
+            for row in row_indices:
+                cell = cells[base + row]
+                if cell:
+                    found.extend(cell.values())
+        return found
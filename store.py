@@ -0,0 +1,179 @@
+### Columns of numbers for all of the entities in a world, one NumPy array
+### per attribute, with each entity owning one dense row (its slot).
+### Entities read and write their attributes through their slot, and the
+### world ages, clamps and culls the whole population at once.
+### The store also keeps running counts and strength totals for each type
+### of entity, so population statistics don't need a scan.
+
+import numpy as np
+
+class EntityStore:
+    '''Per-entity attributes stored as NumPy columns indexed by slot.'''
+
+    COLUMNS = {'kind': np.int64, 'x': np.int64, 'y': np.int64, 'heading': np.int64,
+               'strength': np.int64, 'max_strength': np.int64,
+               'age': np.int64, 'longevity': np.int64,
+               'alive': np.bool_, 'mortal': np.bool_, 'texture': np.int64}
+    """Names and types of the columns."""
+
+    def __init__(self, capacity=128):
+        '''Create empty columns with room for capacity entities.'''
+        self.capacity = capacity
+        # Number of slots in use; they are always 0 ... n-1
+        self.n = 0
+        # The entity in each slot
+        self.entities = []
+        for name, dtype in EntityStore.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # Code for each type of entity, the value in the kind column
+        self.kinds = {}
+        # Code for each texture, the value in the texture column, and the texture of each code
+        self.textures = {}
+        self.texture_names = []
+        # Number of entities, and sum and max of their strengths, indexed by kind
+        self.counts = []
+        self.strength_sums = []
+        self.strength_maxes = []
+        # Whether the max for a kind has to be recomputed before it's used
+        self.max_stale = []
+
+    def __len__(self):
+        '''Number of entities in the store.'''
+        return self.n
+
+    def grow(self):
+        '''Double the capacity of every column.'''
+        self.capacity *= 2
+        for name in EntityStore.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def kind_of(self, typ):
+        '''The kind code for a type of entity, making a new one if necessary.'''
+        kind = self.kinds.get(typ)
+        if kind is None:
+            kind = self.kinds[typ] = len(self.kinds)
+            self.counts.append(0)
+            self.strength_sums.append(0)
+            self.strength_maxes.append(0)
+            self.max_stale.append(False)
+        return kind
+
+    def texture_code(self, texture):
+        '''The code for a texture, making a new one if necessary.'''
+        code = self.textures.get(texture)
+        if code is None:
+            code = self.textures[texture] = len(self.texture_names)
+            self.texture_names.append(texture)
+        return code
+
+    def add(self, entity):
+        '''Give the entity the next free slot, with all of its columns zeroed, and return the slot.'''
+        if self.n == self.capacity:
+            self.grow()
+        slot = self.n
+        for name in EntityStore.COLUMNS:
+            getattr(self, name)[slot] = 0
+        kind = self.kind_of(type(entity))
+        self.kind[slot] = kind
+        self.counts[kind] += 1
+        self.entities.append(entity)
+        entity.slot = slot
+        self.n += 1
+        return slot
+
+    def remove(self, entity):
+        '''Free the entity's slot, moving the entity in the last slot into it.'''
+        slot = entity.slot
+        last = self.n - 1
+        kind = self.kind.item(slot)
+        strength = self.strength.item(slot)
+        self.counts[kind] -= 1
+        self.strength_sums[kind] -= strength
+        if strength >= self.strength_maxes[kind]:
+            self.max_stale[kind] = True
+        if slot != last:
+            for name in EntityStore.COLUMNS:
+                column = getattr(self, name)
+                column[slot] = column[last]
+            moved = self.entities[last]
+            self.entities[slot] = moved
+            moved.slot = slot
+        self.entities.pop()
+        self.n -= 1
+
+    def set_strength(self, slot, value):
+        '''Set the strength in slot, keeping the totals for its kind up to date.'''
+        kind = self.kind.item(slot)
+        old = self.strength.item(slot)
+        self.strength[slot] = value
+        self.strength_sums[kind] += value - old
+        if value > self.strength_maxes[kind]:
+            self.strength_maxes[kind] = value
+        elif value < old and old >= self.strength_maxes[kind]:
+            self.max_stale[kind] = True
+
+    def clamp_strength(self):
+        '''Keep every strength between 0 and its maximum.'''
+        n = self.n
+        strength = self.strength[:n]
+        clamped = np.clip(strength, 0, self.max_strength[:n])
+        changed = np.flatnonzero(clamped != strength)
+        if len(changed):
+            kinds = self.kind[changed]
+            deltas = np.zeros(len(self.kinds), dtype=np.int64)
+            np.add.at(deltas, kinds, clamped[changed] - strength[changed])
+            for kind in np.unique(kinds).tolist():
+                self.strength_sums[kind] += deltas.item(kind)
+                self.max_stale[kind] = True
+            strength[changed] = clamped[changed]
+
+    def recount(self):
+        '''Recompute the strength totals for every kind from the columns, after
+        the columns have been written directly.'''
+        n = self.n
+        for kind in self.kinds.values():
+            strengths = self.strength[:n][self.kind[:n] == kind]
+            self.strength_sums[kind] = strengths.sum().item()
+            self.max_stale[kind] = True
+
+    def strength_max(self, kind):
+        '''The highest strength among entities of a kind, recomputed only if it may have dropped.'''
+        if self.max_stale[kind]:
+            n = self.n
+            strengths = self.strength[:n][self.kind[:n] == kind]
+            self.strength_maxes[kind] = strengths.max().item() if len(strengths) else 0
+            self.max_stale[kind] = False
+        return self.strength_maxes[kind]
+
+    def count(self, typ):
+        '''Number of entities of type typ, including its subclasses.'''
+        return sum([self.counts[kind] for t, kind in self.kinds.items() if issubclass(t, typ)])
+
+    def census(self, typ):
+        '''Number of entities of type typ (including its subclasses), and the sum and max of
+        their strengths.'''
+        n, total, highest = 0, 0, 0
+        for t, kind in self.kinds.items():
+            if issubclass(t, typ) and self.counts[kind]:
+                n += self.counts[kind]
+                total += self.strength_sums[kind]
+                highest = max(highest, self.strength_max(kind))
+        return n, total, highest
+
+    def sweep(self):
+        '''Clamp strengths, age the mortal entities by one step, and mark as dead the
+        ones that have run out of strength or time. Return the entities to remove,
+        including those that had already died.'''
+        n = self.n
+        self.clamp_strength()
+        mortal = self.mortal[:n]
+        age = self.age[:n]
+        age += mortal
+        alive = self.alive[:n]
+        dying = mortal & (~alive | (self.strength[:n] <= 0) | (age >= self.longevity[:n]))
+        alive &= ~dying
+        entities = self.entities
+        return [entities[slot] for slot in np.flatnonzero(dying)]
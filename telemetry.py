@@ -0,0 +1,177 @@
+### Per-step statistics for long runs, streamed to an append-only columnar file.
+### A Telemetry object observes a World (like a view does). Every so many steps
+### it records, for each type of org, the number alive, the births, spawns,
+### deaths, matings and food eaten since the last record, and the sum, max and
+### a histogram of strengths. Rows collect in preallocated NumPy blocks; full
+### blocks go to a background thread that appends them to the file, so the
+### step loop never waits for the disk.
+###
+### A telemetry file is laid out as
+###   MAGIC | header length (4 bytes, little-endian) | JSON header | blocks
+### where the header lists the columns and each block is a row count (4 bytes)
+### followed by each column's values for those rows, one column after another.
+### read() puts the blocks back together into one array per column.
+
+import json, queue, struct, threading
+import numpy as np
+from world import *
+
+MAGIC = b'EWTEL001'
+"""First bytes of every telemetry file."""
+
+EVENTS = ('births', 'spawns', 'deaths', 'matings', 'eaten')
+"""Events counted for each type (see World.note())."""
+
+class Telemetry:
+    '''Records statistics about a world every few steps in a columnar file.'''
+
+    EVERY = 1
+    """Record every this many steps."""
+    BLOCK_ROWS = 1024
+    """Rows collected before they are handed to the writer."""
+    BINS = 12
+    """Number of bins in the strength histograms, from 0 to Org.MAX_STRENGTH."""
+
+    def __init__(self, world, path, every=None, block_rows=None):
+        '''Start recording the world's statistics to a new file at path.'''
+        self.world = world
+        self.path = path
+        self.every = every or Telemetry.EVERY
+        self.block_rows = block_rows or Telemetry.BLOCK_ROWS
+        self.bin_width = -(-Org.MAX_STRENGTH // Telemetry.BINS)
+        # The types recorded, in column order
+        self.types = [typ for typ in world.populations if issubclass(typ, Org)]
+        # Name, type and number of values per row of each column
+        self.columns = [('step', np.int64, 1)]
+        for typ in self.types:
+            name = typ.__name__ + '.'
+            self.columns.append((name + 'n', np.int64, 1))
+            self.columns.extend([(name + event, np.int64, 1) for event in EVENTS])
+            self.columns.extend([(name + 'strength_sum', np.int64, 1),
+                                 (name + 'strength_max', np.int64, 1),
+                                 (name + 'strength_hist', np.int64, Telemetry.BINS)])
+        # Events since the last record, indexed by event name, then type
+        self.events = {event: dict.fromkeys(self.types, 0) for event in EVENTS}
+        self.steps = 0
+        self.block = self.new_block()
+        self.rows = 0
+        header = json.dumps({'columns': [(name, np.dtype(dtype).str, width) \
+                                         for name, dtype, width in self.columns],
+                             'bin_width': self.bin_width,
+                             'every': self.every}).encode()
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        # Full blocks waiting to be written; None tells the writer to stop
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_blocks, daemon=True)
+        self.writer.start()
+        world.telemetry = self
+
+    def new_block(self):
+        '''Empty arrays for a block of rows, one per column.'''
+        return [np.zeros((self.block_rows, width), dtype=dtype) \
+                for name, dtype, width in self.columns]
+
+    def world_stepped(self):
+        '''Tally the step's events, and record a row if one is due.'''
+        events = self.events
+        for event, counts in self.world.events.items():
+            tally = events.get(event)
+            if tally is not None:
+                for typ, n in counts.items():
+                    if typ in tally:
+                        tally[typ] += n
+        self.steps += 1
+        if self.steps >= self.every:
+            self.record()
+
+    def record(self):
+        '''Add a row with the world's statistics to the block.'''
+        world = self.world
+        store = world.store
+        n = store.n
+        kinds = [store.kinds.get(typ) for typ in self.types]
+        # One histogram per kind in a single pass over the strengths
+        bins = np.minimum(store.strength[:n] // self.bin_width, Telemetry.BINS - 1)
+        hists = np.bincount(store.kind[:n] * Telemetry.BINS + np.maximum(bins, 0),
+                            minlength=len(store.kinds) * Telemetry.BINS)
+        row = self.rows
+        block = self.block
+        block[0][row] = world.steps
+        c = 1
+        for typ, kind in zip(self.types, kinds):
+            block[c][row] = store.counts[kind] if kind is not None else 0
+            c += 1
+            for event in EVENTS:
+                block[c][row] = self.events[event][typ]
+                self.events[event][typ] = 0
+                c += 1
+            if kind is not None:
+                block[c][row] = store.strength_sums[kind]
+                block[c + 1][row] = store.strength_max(kind)
+                block[c + 2][row] = hists[kind * Telemetry.BINS:(kind + 1) * Telemetry.BINS]
+            c += 3
+        self.steps = 0
+        self.rows += 1
+        if self.rows == self.block_rows:
+            self.flush()
+
+    def flush(self):
+        '''Hand the rows collected so far to the writer, and start a new block.'''
+        if self.rows:
+            self.queue.put((self.rows, self.block))
+            self.block = self.new_block()
+            self.rows = 0
+
+    def write_blocks(self):
+        '''Append blocks to the file as they arrive (in the writer thread).'''
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            rows, block = item
+            self.file.write(struct.pack('<I', rows))
+            for column in block:
+                self.file.write(column[:rows].tobytes())
+            self.file.flush()
+
+    def close(self):
+        '''Write out everything recorded, with a last row for any steps since the
+        last record, and stop observing the world.'''
+        if self.steps:
+            self.record()
+        self.flush()
+        self.queue.put(None)
+        self.writer.join()
+        self.file.close()
+        if self.world.telemetry is self:
+            self.world.telemetry = None
+
+def read(path):
+    '''The columns of the telemetry file at path, as a dict of arrays indexed by
+    column name; a histogram column has a row of BINS counts per record.'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(path + ' is not a telemetry file')
+    position = len(MAGIC)
+    length, = struct.unpack_from('<I', data, position)
+    position += 4
+    columns = json.loads(data[position:position + length])['columns']
+    position += length
+    blocks = {name: [] for name, dtype, width in columns}
+    while position + 4 <= len(data):
+        rows, = struct.unpack_from('<I', data, position)
+        position += 4
+        sizes = [rows * width * np.dtype(dtype).itemsize for name, dtype, width in columns]
+        if position + sum(sizes) > len(data):
+            # The last block was cut off
+            break
+        for (name, dtype, width), size in zip(columns, sizes):
+            blocks[name].append(np.frombuffer(data, dtype, rows * width, position).reshape(rows, width))
+            position += size
+    arrays = {}
+    for name, dtype, width in columns:
+        array = np.concatenate(blocks[name]) if blocks[name] else np.zeros((0, width), dtype)
+        arrays[name] = array[:, 0] if width == 1 else array
+    return arrays
@@ -0,0 +1,23 @@
+### The modules live at the top of the repository and import each other by
+### name, so the tests put it on the path. The simulation's settings are class
+### attributes, which some tests change; they are put back after every test.
+
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from world import *
+
+SETTINGS = [(Entity, 'N'), (Network, 'eta'), (Brain, 'exploitation'), (Genome, 'evolve'),
+            (QLearner, 'replay'), (QLearner, 'REPLAY_SHARED'), (QLearner, 'REPLAY_CAPACITY'),
+            (Ringoid, 'tabular'), (TableBrain, 'eta')]
+"""Class attributes that tests (or restoring a checkpoint) may change."""
+
+@pytest.fixture(autouse=True)
+def settings():
+    '''Put the simulation's settings back as they were before the test.'''
+    saved = [(cls, name, getattr(cls, name)) for cls, name in SETTINGS]
+    yield
+    for cls, name, value in saved:
+        setattr(cls, name, value)
@@ -0,0 +1,96 @@
+### The array kernels (arrays.py) and heading tables (geometry.py) should give
+### what the scalar functions in utils.py give, element by element.
+
+import random
+import numpy as np
+import pytest
+from utils import *
+from arrays import *
+from geometry import *
+
+class FixedRandom:
+    '''Stands in for a random.Random whose next random() is known.'''
+
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+@pytest.mark.parametrize('wrap_x, wrap_y', [(0, 0), (450, 450), (120, 90)])
+def test_point_dists(rng, wrap_x, wrap_y):
+    x1, y1, x2, y2 = rng.integers(0, 450, (4, 500))
+    expected = [get_point_dist(*point, wrap_x, wrap_y) \
+                for point in zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist())]
+    assert point_dists(x1, y1, x2, y2, wrap_x, wrap_y).tolist() == expected
+
+def test_point_dists_matrix(rng):
+    xs, ys = rng.integers(0, 100, (2, 30))
+    dists = point_dists(xs[:, None], ys[:, None], xs, ys, 100, 100)
+    for i in range(30):
+        for j in range(30):
+            assert dists[i, j] == get_point_dist(xs[i], ys[i], xs[j], ys[j], 100, 100)
+
+@pytest.mark.parametrize('wrap_x, wrap_y', [(0, 0), (450, 450), (120, 90)])
+def test_point_angles(rng, wrap_x, wrap_y):
+    x1, y1, x2, y2 = rng.integers(0, 450, (4, 500))
+    # Some vertical and coincident pairs too
+    x2[:50] = x1[:50]
+    y2[:10] = y1[:10]
+    expected = [get_point_angle(*point, wrap_x, wrap_y) \
+                for point in zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist())]
+    assert point_angles(x1, y1, x2, y2, wrap_x, wrap_y).tolist() == expected
+
+@pytest.mark.parametrize('mult', [0.5, 1.0, 4.0])
+def test_luce_choices(rng, mult):
+    values = rng.normal(size=(400, 5))
+    randoms = rng.random(400)
+    expected = [exp_luce_choice(row, mult, FixedRandom(r)) \
+                for row, r in zip(values.tolist(), randoms.tolist())]
+    assert luce_choices(values, mult, randoms).tolist() == expected
+
+def test_luce_choices_large_values():
+    '''Values that overflow math.exp() still give probabilities.'''
+    probabilities = luce_probabilities([[1000.0, 0.0], [0.0, 1000.0]])
+    assert np.allclose(probabilities, [[1, 0], [0, 1]])
+
+def test_dot_products_and_normalized(rng):
+    v1, v2 = rng.normal(size=(2, 50, 6))
+    assert np.allclose(dot_products(v1, v2), [dot_product(a, b) for a, b in zip(v1, v2)])
+    expected = []
+    for row in v1.tolist():
+        normalize(row)
+        expected.append(row)
+    assert np.allclose(normalized(v1), expected)
+
+def test_sigmoids(rng):
+    inputs = rng.normal(scale=5, size=300)
+    assert np.allclose(sigmoids(inputs, 0.5, 2.0), [sigmoid(x, 0.5, 2.0) for x in inputs])
+    outputs = rng.random(300)
+    assert np.allclose(sigmoid_slopes(outputs), [sigmoid_slope(x) for x in outputs])
+
+def test_bins_to_decs(rng):
+    bits = rng.integers(0, 2, (100, 9))
+    assert bins_to_decs(bits).tolist() == [bin_to_dec(row) for row in bits.tolist()]
+
+@pytest.mark.parametrize('n_bits, group', [(12, 3), (81 * 4 * 3, 3), (10, 5)])
+def test_bit_group_values(rng, n_bits, group):
+    bits = rng.integers(0, 2, (20, n_bits))
+    packed = np.packbits(bits, axis=-1)
+    expected = [[bin_to_dec(row[i:i + group]) for i in range(0, n_bits, group)] \
+                for row in bits.tolist()]
+    assert bit_group_values(packed, n_bits, group).tolist() == expected
+
+@pytest.mark.parametrize('dist', [1, 10, 13, 20])
+def test_heading_tables(dist):
+    for heading in range(HEADINGS):
+        assert endpoint(7, -3, heading, dist) == get_endpoint(7, -3, heading, dist)
+        assert step_offset(heading, dist) == xy_dist(heading, dist)
+    headings = np.arange(HEADINGS)
+    xs, ys = endpoints(np.full(HEADINGS, 7), np.full(HEADINGS, -3), headings, dist)
+    assert list(zip(xs.tolist(), ys.tolist())) == \
+           [get_endpoint(7, -3, heading, dist) for heading in range(HEADINGS)]
@@ -0,0 +1,16 @@
+### Configs for batch runs name the types of entity in them.
+
+import pytest
+from batch import *
+
+def test_entity_types():
+    counts = {'init': 1, 'min': 0, 'max': 2}
+    assert entity_types({'Diskoid': counts, Plasmoid: counts}) == \
+           {Diskoid: counts, Plasmoid: counts}
+    assert entity_names(entity_types({'Ringoid': counts})) == {'Ringoid': counts}
+    assert entity_types(None) is None
+
+@pytest.mark.parametrize('name', ['Diskoidd', 'World', 'Entity', 'np'])
+def test_unknown_entity_types(name):
+    with pytest.raises(ValueError, match=repr(name)):
+        entity_types({name: {'init': 1, 'min': 0, 'max': 2}})
@@ -0,0 +1,61 @@
+### Learning in a BrainBank, which stacks the output weights of a species'
+### brains, should leave every brain just as learning brain by brain does.
+
+import numpy as np
+import pytest
+from world import *
+
+POPULATIONS = {Ringoid: {'init': 15, 'min': 15, 'max': 30},
+               Plasmoid: {'init': 80, 'min': 80, 'max': 90}}
+
+def run(monkeypatch, banked, steps=80):
+    '''Ringoid ids (counted from the first), coordinates and output weights after steps.'''
+    if not banked:
+        monkeypatch.setattr(BrainBank, 'batchable', staticmethod(lambda brain: False))
+    world = World(entities=POPULATIONS, seed=5)
+    for i in range(steps):
+        world.step()
+    if banked:
+        assert world.brain_banks
+    else:
+        assert not world.brain_banks
+    first = min(world.entities)
+    return sorted((ringoid.id - first, ringoid.coords, ringoid.brain.layers[-1].weights.tolist())
+                  for ringoid in world.entities.values() if isinstance(ringoid, Ringoid))
+
+@pytest.mark.parametrize('replay', [False, True])
+def test_bank_learns_like_brains(monkeypatch, replay):
+    Network.eta = 0.02
+    QLearner.replay = replay
+    QLearner.REPLAY_CAPACITY = 50
+    banked = run(monkeypatch, True)
+    monkeypatch.undo()
+    unbanked = run(monkeypatch, False)
+    # The same critters in the same places, having made the same choices
+    assert [ringoid[:2] for ringoid in banked] == [ringoid[:2] for ringoid in unbanked]
+    # Summing the updates as matrices may round differently in the last place
+    for (id, coords, weights), (id, coords, weights2) in zip(banked, unbanked):
+        assert np.allclose(weights, weights2, rtol=0, atol=1e-12)
+    # And they did learn something
+    assert any(np.any(weights) for id, coords, weights in banked)
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_world_steps_after_learners_die_out(shared):
+    Network.eta = 0.02
+    QLearner.replay = shared
+    QLearner.REPLAY_SHARED = shared
+    world = World(entities={Ringoid: {'init': 5, 'min': 0, 'max': 10},
+                            Plasmoid: {'init': 20, 'min': 20, 'max': 30}}, seed=2)
+    for i in range(10):
+        world.step()
+    bank = world.brain_banks[Ringoid]
+    for ringoid in list(world.registry[Ringoid].values()):
+        ringoid.die()
+    for i in range(5):
+        world.step()
+    assert not world.registry[Ringoid] and len(bank) == 0
+    # A learner born later joins the same bank
+    ringoid = world.add_entity(Ringoid)
+    for i in range(5):
+        world.step()
+    assert world.brain_banks[Ringoid] is bank and bank.brains == [ringoid.brain]
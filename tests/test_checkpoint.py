@@ -0,0 +1,76 @@
+### A world restored from a checkpoint should go on exactly as the world it
+### was saved from does.
+
+import numpy as np
+import pytest
+import checkpoint
+from world import *
+
+POPULATIONS = {Diskoid: {'init': 30, 'min': 0, 'max': 50},
+               Ringoid: {'init': 5, 'min': 0, 'max': 50},
+               Plasmoid: {'init': 75, 'min': 75, 'max': 80},
+               Clod: {'init': 10, 'min': 0, 'max': 10}}
+
+def state(world):
+    '''Everything about world that stepping depends on.'''
+    store = world.store
+    n = store.n
+    entities = store.entities[:n]
+    return {'steps': world.steps,
+            'stats': world.get_stats(),
+            'ids': [entity.id for entity in entities],
+            'types': [type(entity).__name__ for entity in entities],
+            'textures': [entity.texture for entity in entities],
+            # Kind and texture codes are given out in the order they first appear, so
+            # compare types and textures
+            'columns': {name: getattr(store, name)[:n].tolist() for name in EntityStore.COLUMNS \
+                        if name not in ('kind', 'texture')},
+            'rngs': [entity.rng.getstate() for entity in entities],
+            'weights': [entity.brain.layers[-1].weights.tolist() for entity in entities \
+                        if getattr(entity, 'brain', None) and entity.brain.learning \
+                        and not hasattr(entity.brain, 'table')],
+            'tables': [entity.brain.table.tolist() for entity in entities \
+                       if hasattr(getattr(entity, 'brain', None), 'table')],
+            'genomes': [entity.genome.bits.tolist() for entity in entities if entity.genome]}
+
+@pytest.mark.parametrize('tabular', [False, True])
+def test_restored_world_steps_identically(tmp_path, tabular):
+    Genome.evolve = True
+    Network.eta = 0.05
+    Ringoid.tabular = tabular
+    world = World(entities=POPULATIONS, seed=1)
+    for i in range(60):
+        world.step()
+    path = str(tmp_path / 'world.ckpt')
+    checkpoint.save(world, path)
+    for i in range(60):
+        world.step()
+    expected = state(world)
+    restored = checkpoint.restore(path)
+    for i in range(60):
+        restored.step()
+    assert state(restored) == expected
+
+def test_restore_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a checkpoint at all')
+    with pytest.raises(ValueError):
+        checkpoint.restore(str(path))
+
+def test_restore_leaves_other_worlds_alone(tmp_path):
+    '''Entity ids belong to each world, so restoring an old checkpoint doesn't make
+    another world hand out ids its entities already have.'''
+    old = World(entities=POPULATIONS, seed=4)
+    for i in range(20):
+        old.step()
+    path = str(tmp_path / 'old.ckpt')
+    checkpoint.save(old, path)
+    world = World(entities=POPULATIONS, seed=5)
+    for i in range(100):
+        world.step()
+    restored = checkpoint.restore(path)
+    assert restored.ids == old.ids
+    for i in range(100):
+        world.step()
+    assert all(entity_id == entity.id for entity_id, entity in world.entities.items())
+    assert len(world.entities) == world.store.n
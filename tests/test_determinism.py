@@ -0,0 +1,44 @@
+### Everything random in a world comes from streams derived from its seed,
+### each entity drawing from its own, so a seed always gives the same world,
+### however the entities happen to be ordered when they step.
+
+import pytest
+from world import *
+
+POPULATIONS = {Diskoid: {'init': 30, 'min': 0, 'max': 50},
+               Ringoid: {'init': 8, 'min': 0, 'max': 50},
+               Plasmoid: {'init': 75, 'min': 75, 'max': 80},
+               Clod: {'init': 10, 'min': 0, 'max': 10}}
+
+def state(world):
+    '''Each entity's state, in order of id.'''
+    entities = sorted(world.entities.values(), key=lambda entity: entity.id)
+    return [(entity.id, type(entity).__name__, entity.coords, getattr(entity, 'heading', 0),
+             getattr(entity, 'strength', 0), getattr(entity, 'age', 0), entity.rng.getstate(),
+             entity.genome.bits.tolist() if entity.genome else None,
+             entity.brain.layers[-1].weights.tolist() \
+             if getattr(entity, 'brain', None) and entity.brain.learning else None) \
+            for entity in entities]
+
+def run(seed, reverse=False, steps=80):
+    '''The state of a world with seed after steps, with the entities stepping in reverse
+    order on every step if reverse.'''
+    Genome.evolve = True
+    Network.eta = 0.05
+    world = World(entities=POPULATIONS, seed=seed)
+    for i in range(steps):
+        if reverse:
+            world.entities = dict(reversed(world.entities.items()))
+            for typ, members in world.registry.items():
+                world.registry[typ] = dict(reversed(members.items()))
+        world.step()
+    return world.get_stats(), state(world)
+
+def test_same_seed_same_world():
+    assert run(9) == run(9)
+
+def test_different_seeds_differ():
+    assert run(9, steps=5) != run(10, steps=5)
+
+def test_order_does_not_matter():
+    assert run(9, reverse=True) == run(9)
@@ -0,0 +1,79 @@
+### Crossing over and compiling genomes a whole generation at a time should
+### give what doing it one genome at a time does, and anything that changes
+### a genome's bits should make it compile its policy again.
+
+import random
+import numpy as np
+import pytest
+from genome import *
+
+N_STATES, N_ACTIONS = 81, 4
+
+class Animal:
+    '''Just what a Genome needs of its animal: a stream of random numbers.'''
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.genome = Genome(self, N_STATES, N_ACTIONS)
+
+def parents(n):
+    '''n pairs of animals with random genomes.'''
+    animals1 = [Animal(i) for i in range(n)]
+    animals2 = [Animal(1000 + i) for i in range(n)]
+    for animal in animals1 + animals2:
+        animal.genome.initialize()
+    return animals1, animals2
+
+def offspring(n, seed):
+    '''Animals for n pairs of offspring, with streams that depend on seed.'''
+    return [Animal(seed + i) for i in range(n)], [Animal(seed + 500 + i) for i in range(n)]
+
+@pytest.mark.parametrize('evolve', [True, False])
+def test_crossover_all_matches_crossover(monkeypatch, evolve):
+    Genome.evolve = evolve
+    # Enough mutation that every genome gets some
+    monkeypatch.setattr(Genome, 'MUTATION', 0.02)
+    animals1, animals2 = parents(20)
+    one1, one2 = offspring(20, 5000)
+    for a1, a2, o1, o2 in zip(animals1, animals2, one1, one2):
+        a1.genome.crossover(a2.genome, o1, o2)
+    all1, all2 = offspring(20, 5000)
+    Genome.crossover_all([a.genome for a in animals1], [a.genome for a in animals2],
+                         all1, all2)
+    for one, every in zip(one1 + one2, all1 + all2):
+        assert one.genome.bits.tolist() == every.genome.bits.tolist()
+        assert one.rng.getstate() == every.rng.getstate()
+        assert one.genome.get_best_action(7) == every.genome.get_best_action(7)
+        one.genome.compile()
+        assert every.genome.policy == one.genome.policy
+
+def test_compile_all_matches_compile():
+    animals, others = parents(10)
+    genomes = [animal.genome for animal in animals]
+    Genome.compile_all(genomes)
+    for genome in genomes:
+        policy = genome.policy
+        genome.compile()
+        assert policy == genome.policy
+
+def test_mutate_invalidates_policy(monkeypatch):
+    monkeypatch.setattr(Genome, 'MUTATION', 0.2)
+    genome = parents(1)[0][0].genome
+    genome.get_best_action(0)
+    assert genome.policy is not None
+    genome.mutate()
+    assert genome.policy is None
+    policy = [genome.get_best_action(state) for state in range(N_STATES)]
+    values = np.array(genome.get_values()).reshape(N_STATES, N_ACTIONS)
+    assert policy == values.argmax(axis=1).tolist()
+
+def test_from_bytes_invalidates_policy():
+    (genome, other), rest = parents(2)
+    genome, other = genome.genome, other.genome
+    genome.get_best_action(0)
+    genome.from_bytes(other.to_bytes())
+    assert genome.policy is None
+    other.compile()
+    assert [genome.get_best_action(state) for state in range(N_STATES)] == other.policy
+    with pytest.raises(ValueError):
+        genome.from_bytes(b'short')
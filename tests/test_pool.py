@@ -0,0 +1,75 @@
+### Dead entities are kept in a pool and renewed instead of new ones being
+### made. A renewed entity should be just like a new one, so pooling can't
+### change what happens in a world.
+
+import pytest
+from world import *
+
+POPULATIONS = {Diskoid: {'init': 40, 'min': 10, 'max': 60},
+               Ringoid: {'init': 8, 'min': 8, 'max': 20},
+               Plasmoid: {'init': 75, 'min': 75, 'max': 80},
+               Clod: {'init': 10, 'min': 0, 'max': 10}}
+
+def row(entity):
+    '''The entity's store columns (other than the codes the store gives out).'''
+    return {name: getattr(entity.store, name)[entity.slot].item() \
+            for name in EntityStore.COLUMNS if name not in ('kind', 'texture')}
+
+def learned(entity):
+    '''The Q table or output weights of a learning critter.'''
+    brain = getattr(entity, 'brain', None)
+    if brain is None or not brain.learning:
+        return None
+    if isinstance(brain, TableBrain):
+        return brain.table.tolist()
+    return brain.layers[-1].weights.tolist()
+
+def state(world):
+    '''Each entity's columns and parts, in order of id.'''
+    return [(entity.id, type(entity).__name__, row(entity), entity.texture, entity.food,
+             entity.rng.getstate(), entity.genome.to_bytes() if entity.genome else None,
+             learned(entity)) \
+            for entity in sorted(world.entities.values(), key=lambda entity: entity.id)]
+
+@pytest.mark.parametrize('tabular', [False, True])
+def test_pooled_world_matches_unpooled(monkeypatch, tabular):
+    Genome.evolve = True
+    Network.eta = 0.05
+    Ringoid.tabular = tabular
+    def run(pool_size):
+        monkeypatch.setattr(World, 'POOL_SIZE', pool_size)
+        world = World(entities=POPULATIONS, seed=9)
+        for i in range(150):
+            world.step()
+        return world
+    pooled = run(256)
+    unpooled = run(0)
+    assert any(pooled.pool.values()) and not any(unpooled.pool.values())
+    assert state(pooled) == state(unpooled)
+
+@pytest.mark.parametrize('typ', [Diskoid, Ringoid])
+def test_renewed_entity_is_like_new(monkeypatch, typ):
+    Network.eta = 0.05
+    def renew(pool_size):
+        '''A dead entity of type typ, and the one added after it died.'''
+        monkeypatch.setattr(World, 'POOL_SIZE', pool_size)
+        world = World(entities=POPULATIONS, seed=3)
+        for i in range(20):
+            world.step()
+        dead = next(iter(world.registry[typ].values()))
+        # Leave plenty behind in its columns
+        dead.age = 123
+        dead.heading = 45
+        dead.max_strength = 7
+        dead.strength = 5
+        dead.die()
+        world.step()
+        return dead, world.add_entity(typ, (50, 60)), world
+    dead, renewed, world = renew(256)
+    assert renewed is dead
+    dead, new, new_world = renew(0)
+    assert new is not dead
+    assert row(renewed) == row(new)
+    assert state(world) == state(new_world)
+    if typ is Ringoid:
+        assert renewed.brain.learner.last_state is None
@@ -0,0 +1,126 @@
+### The grid of cells the world answers overlap queries from, and the raster
+### of Clods, should find just what testing every body the long way would,
+### all the way around the torus.
+
+import random
+import numpy as np
+import pytest
+from world import *
+
+WIDTH, HEIGHT = 120, 90
+
+POPULATIONS = {Clod: {'init': 12, 'min': 0, 'max': 12},
+               Diskoid: {'init': 15, 'min': 0, 'max': 15},
+               Plasmoid: {'init': 20, 'min': 0, 'max': 20}}
+
+@pytest.fixture
+def world():
+    '''A small world, so that queries often wrap around its edges.'''
+    world = World(WIDTH, HEIGHT, entities=POPULATIONS, seed=3)
+    for i in range(5):
+        world.step()
+    return world
+
+def overlaps(x, y, x1, y1, x2, y2):
+    '''Does a body centered at x, y, or at any copy of x, y around the torus, overlap
+    the rectangle x1, y1, x2, y2?'''
+    r = Entity.RADIUS
+    for cx in (x - 2 * WIDTH, x - WIDTH, x, x + WIDTH, x + 2 * WIDTH):
+        for cy in (y - 2 * HEIGHT, y - HEIGHT, y, y + HEIGHT, y + 2 * HEIGHT):
+            dx = max(x1 - cx, 0, cx - x2)
+            dy = max(y1 - cy, 0, cy - y2)
+            if dx * dx + dy * dy <= r * r:
+                return True
+    return False
+
+def rectangles(n, seed=0):
+    '''n random rectangles, some past the edges of the world.'''
+    rng = random.Random(seed)
+    for i in range(n):
+        x, y = rng.uniform(-30, WIDTH + 30), rng.uniform(-30, HEIGHT + 30)
+        yield x, y, x + rng.uniform(0, 40), y + rng.uniform(0, 40)
+
+def test_find_overlapping(world):
+    entities = list(world.entities.values())
+    for x1, y1, x2, y2 in rectangles(300):
+        found = world.find_overlapping(x1, y1, x2, y2)
+        assert len(found) == len(set(map(id, found)))
+        assert {entity.id for entity in found} == \
+               {entity.id for entity in entities if overlaps(*entity.coords, x1, y1, x2, y2)}
+
+def test_find_overlapping_kind(world):
+    for x1, y1, x2, y2 in rectangles(100, seed=1):
+        assert {entity.id for entity in world.find_overlapping(x1, y1, x2, y2, Clod)} == \
+               {entity.id for entity in world.find_overlapping(x1, y1, x2, y2) \
+                if isinstance(entity, Clod)}
+
+def test_spatial_hash_follows_moves(world):
+    for i in range(20):
+        world.step()
+    space = world.space
+    assert len(space) == len(world.entities)
+    for entity in world.entities.values():
+        assert entity.id in space.cells[space.cell_index(*entity.coords)]
+
+@pytest.mark.parametrize('half', [0, 1, 7])
+def test_find_overlapping_points(world, half):
+    rng = np.random.default_rng(half)
+    xs = rng.integers(-20, WIDTH + 20, 400)
+    ys = rng.integers(-20, HEIGHT + 20, 400)
+    points, slots = world.find_overlapping_points(xs, ys, half)
+    store = world.store
+    expected = {(i, slot) for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())) \
+                for slot in range(store.n) \
+                if overlaps(store.x.item(slot), store.y.item(slot),
+                            x - half, y - half, x + half, y + half)}
+    assert len(points) == len(expected)
+    assert set(zip(points.tolist(), slots.tolist())) == expected
+
+@pytest.mark.parametrize('half', [0, 3, Entity.RADIUS])
+def test_clod_raster(world, half):
+    clods = [clod.coords for clod in world.entities.values() if isinstance(clod, Clod)]
+    assert len(world.clods) == len(clods)
+    for x in range(WIDTH):
+        for y in range(0, HEIGHT, 2):
+            assert world.clods.blocked(x, y, half) == \
+                   any(overlaps(cx, cy, x - half, y - half, x + half, y + half) \
+                       for cx, cy in clods)
+
+def test_clod_raster_after_removal(world):
+    clod = next(entity for entity in world.entities.values() if isinstance(entity, Clod))
+    x, y = clod.coords
+    world.remove_entity(clod)
+    others = [entity.coords for entity in world.entities.values() if isinstance(entity, Clod)]
+    half = Entity.RADIUS
+    assert world.clods.blocked(x, y, half) == \
+           any(overlaps(cx, cy, x - half, y - half, x + half, y + half) for cx, cy in others)
+
+def test_new_entities_avoid_clods(world):
+    for x, y in world.get_entities_coords(200):
+        assert not world.entity_overlaps_with(x, y, Clod)
+
+@pytest.mark.parametrize('n', [2, 40, 300])
+def test_overlapping_pairs(world, n):
+    rng = np.random.default_rng(n)
+    xs = rng.integers(0, WIDTH, n)
+    ys = rng.integers(0, HEIGHT, n)
+    firsts, seconds = world.overlapping_pairs(xs, ys)
+    r = Entity.RADIUS
+    expected = [(i, j) for i in range(n) for j in range(i + 1, n) \
+                if overlaps(xs[i], ys[i], xs[j] - r, ys[j] - r, xs[j] + r, ys[j] + r)]
+    assert list(zip(firsts.tolist(), seconds.tolist())) == expected
+
+def test_find_mates(world, monkeypatch):
+    # Crowd the Diskoids together, and have every pair that can mate do so
+    rng = random.Random(4)
+    for diskoid in world.registry[Diskoid].values():
+        world.move_entity(diskoid, (rng.randrange(40), rng.randrange(30)))
+    monkeypatch.setattr(Critter, 'mate_prob', lambda critter, potential: 1.0)
+    pairs = world.find_mates()
+    diskoids = sorted(world.registry[Diskoid].values(), key=lambda diskoid: diskoid.id)
+    r = Entity.RADIUS
+    expected = [(d1.id, d2.id) for i, d1 in enumerate(diskoids) for d2 in diskoids[i + 1:] \
+                if overlaps(*d1.coords, d2.coords[0] - r, d2.coords[1] - r,
+                            d2.coords[0] + r, d2.coords[1] + r)]
+    assert expected
+    assert [(d1.id, d2.id) for d1, d2 in pairs] == expected
@@ -0,0 +1,45 @@
+### Tabular Q learning: Ringoids with TableBrains learn only while learning
+### is on, and their tables are saved and restored with the world.
+
+import numpy as np
+import pytest
+import checkpoint
+from world import *
+
+POPULATIONS = {Ringoid: {'init': 10, 'min': 0, 'max': 20},
+               Plasmoid: {'init': 75, 'min': 75, 'max': 80},
+               Clod: {'init': 10, 'min': 0, 'max': 10}}
+
+def tabular_world(steps, eta):
+    '''A world of Ringoids with TableBrains, after steps with learning rate eta.'''
+    Ringoid.tabular = True
+    Network.eta = eta
+    world = World(entities=POPULATIONS, seed=6)
+    for i in range(steps):
+        world.step()
+    return world
+
+def ringoids(world):
+    return sorted(world.registry[Ringoid].values(), key=lambda ringoid: ringoid.id)
+
+def test_tables_learn_only_when_learning_is_on():
+    world = tabular_world(60, 0.0)
+    assert all(isinstance(ringoid.brain, TableBrain) for ringoid in ringoids(world))
+    assert not any(np.any(ringoid.brain.table) for ringoid in ringoids(world))
+    world = tabular_world(60, 0.05)
+    assert any(np.any(ringoid.brain.table) for ringoid in ringoids(world))
+
+def test_tables_survive_checkpoint(tmp_path):
+    world = tabular_world(60, 0.05)
+    path = str(tmp_path / 'tables.ckpt')
+    checkpoint.save(world, path)
+    Ringoid.tabular = False
+    TableBrain.eta = 0.5
+    restored = checkpoint.restore(path)
+    assert Ringoid.tabular and TableBrain.eta == 0.25
+    assert len(ringoids(restored)) == len(ringoids(world))
+    for ringoid, copy in zip(ringoids(world), ringoids(restored)):
+        assert isinstance(copy.brain, TableBrain) and copy.sensor.indexed
+        assert np.array_equal(copy.brain.table, ringoid.brain.table)
+        for name in ('last_state', 'last_action', 'last_reinforcement'):
+            assert getattr(copy.brain.learner, name) == getattr(ringoid.brain.learner, name)
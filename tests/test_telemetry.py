@@ -0,0 +1,35 @@
+### A telemetry file should account for every event in a run, including the
+### steps after the last full interval.
+
+import numpy as np
+import pytest
+from telemetry import *
+
+POPULATIONS = {Diskoid: {'init': 30, 'min': 10, 'max': 50},
+               Plasmoid: {'init': 60, 'min': 60, 'max': 70}}
+
+@pytest.mark.parametrize('steps, every, block_rows', [(23, 5, 2), (20, 5, 1024), (7, 10, 4)])
+def test_totals_match_world(tmp_path, steps, every, block_rows):
+    Genome.evolve = True
+    world = World(entities=POPULATIONS, seed=8)
+    path = str(tmp_path / 'run.tel')
+    telemetry = Telemetry(world, path, every=every, block_rows=block_rows)
+    totals = {event: dict.fromkeys(telemetry.types, 0) for event in EVENTS}
+    for i in range(steps):
+        world.step()
+        for event, counts in world.events.items():
+            for typ, n in counts.items():
+                if event in totals and typ in totals[event]:
+                    totals[event][typ] += n
+    telemetry.close()
+    columns = read(path)
+    assert columns['step'].tolist()[-1] == steps
+    assert len(columns['step']) == -(-steps // every)
+    for typ in telemetry.types:
+        name = typ.__name__ + '.'
+        for event in EVENTS:
+            assert columns[name + event].sum() == totals[event][typ]
+        assert columns[name + 'n'][-1] == world.n_entities(typ)
+        assert columns[name + 'strength_hist'][-1].sum() == world.n_entities(typ)
+    # Something happened to count
+    assert sum(sum(counts.values()) for counts in totals.values())
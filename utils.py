@@ -113,12 +113,13 @@ def get_endpoint(x1, y1, angle, dist):
     return x1 + int(round(dist * math.cos(math.radians(360 - angle)))), \
            y1 + int(round(dist * math.sin(math.radians(360 - angle))))
 
-def exp_luce_choice(seq, mult = 1.0):
-    '''Choose index of value in seq, treating value as probabilistic weight.'''
+def exp_luce_choice(seq, mult = 1.0, rng=random):
+    '''Choose index of value in seq, treating value as probabilistic weight.
+    rng is where the random number comes from (the random module or a random.Random).'''
     exp_seq = [math.exp(x * mult) for x in seq]
     total = sum(exp_seq)
     if total:
-        ran = random.random()
+        ran = rng.random()
         scaled_total = 0.0
         for index, elem in enumerate(exp_seq):
             scaled_total += elem / total
@@ -128,7 +129,7 @@ def exp_luce_choice(seq, mult = 1.0):
         return len(seq) - 1
     else:
         # All values are 0; pick a random position
-        return random.randint(0, len(seq) - 1)
+        return rng.randint(0, len(seq) - 1)
 
 def bin_to_dec(bin):
     '''Convert a list of booleans to the corresponding decimal number.'''
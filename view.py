@@ -0,0 +1,226 @@
+### Split out of main.py (Q320: Spring 2012, Cognitive Science Program, Indiana University).
+###
+### A Canvas that draws a World (see world.py) and follows its changes.
+### The world tells its view when entities are added, removed, moved or
+### turned; nothing in the simulation asks the Canvas for anything.
+### The view only notes what has changed, and brings the Canvas up to date
+### every few steps (or at a target frame rate), touching only the items
+### that changed and are in sight. The items of entities that leave the
+### world are hidden and kept, to be shown again for new entities of the
+### same type, rather than deleted and created again.
+
+import time
+from tkinter import *
+from entity import *
+
+class WorldView(Canvas):
+    """A Canvas showing the entities in a World."""
+
+    COLOR = 'black'
+    """Color for the Canvas background."""
+    FRAME_STEPS = 1
+    """Redraw after this many steps of the world."""
+    FRAME_RATE = None
+    """If not None, also redraw whenever this many frames per second are due."""
+    SPARES = 256
+    """Most sets of hidden items kept for each type of entity."""
+
+    def __init__(self, frame, world, frame_steps=None, frame_rate=None, show_feelers=True):
+        """Create the Canvas and a graphic for every entity already in the world."""
+        Canvas.__init__(self, frame, bg=WorldView.COLOR,
+                        width=world.width, height=world.height)
+        self.world = world
+        self.frame_steps = frame_steps or WorldView.FRAME_STEPS
+        self.frame_rate = frame_rate or WorldView.FRAME_RATE
+        # Whether to draw the critters' feelers
+        self.show_feelers = show_feelers
+        # Canvas ids of the body of each entity, indexed by entity id
+        self.bodies = {}
+        # Canvas ids of the feelers of each entity, indexed by entity id
+        self.feelers = {}
+        # Entity drawn by each body, indexed by Canvas id, for the click handlers
+        self.owners = {}
+        # Hidden bodies, each with a list of hidden feelers, for each type of entity
+        self.spares = {}
+        # Entities added since the last redraw, indexed by entity id
+        self.added = {}
+        # Type, body and feelers of each entity removed since the last redraw
+        self.removed = []
+        # Canvas ids of items to delete at the next redraw
+        self.deleted = []
+        # Entities moved or turned since the last redraw, indexed by entity id
+        self.dirty = {}
+        # Steps and time since the last redraw
+        self.steps = 0
+        self.last_flush = time.perf_counter()
+        for entity in world.entities.values():
+            self.entity_added(entity)
+        world.view = self
+        self.flush()
+
+    ## Notifications from the world; these only record what has changed
+
+    def entity_added(self, entity):
+        '''Note a new entity, to be drawn at the next redraw.'''
+        self.added[entity.id] = entity
+
+    def entity_removed(self, entity):
+        '''Note an entity that has left the world.'''
+        if self.added.pop(entity.id, None) is not None:
+            # Never drawn
+            return
+        self.dirty.pop(entity.id, None)
+        self.removed.append((type(entity), self.bodies.pop(entity.id),
+                             self.feelers.pop(entity.id, [])))
+
+    def entity_moved(self, entity):
+        '''Note that an entity has moved.'''
+        self.dirty[entity.id] = entity
+
+    def entity_turned(self, entity):
+        '''Note that an entity has turned.'''
+        self.dirty[entity.id] = entity
+
+    def world_stepped(self):
+        '''Redraw if enough steps or enough time have gone by since the last redraw.'''
+        self.steps += 1
+        if self.steps >= self.frame_steps or \
+           (self.frame_rate and time.perf_counter() - self.last_flush >= 1.0 / self.frame_rate):
+            self.flush()
+
+    ## Bringing the Canvas up to date
+
+    def set_show_feelers(self, show):
+        '''Turn drawing of feelers on or off.'''
+        if show == self.show_feelers:
+            return
+        self.show_feelers = show
+        if show:
+            for entity_id, body in self.bodies.items():
+                self.create_feelers(self.world.entities[entity_id], body)
+        else:
+            for feelers in self.feelers.values():
+                self.deleted.extend(feelers)
+            self.feelers = {}
+            for spares in self.spares.values():
+                for body, feelers in spares:
+                    self.deleted.extend(feelers)
+                    feelers.clear()
+        self.flush()
+
+    def flush(self):
+        '''Make the Canvas match the world, and have Tk draw it.'''
+        for item in self.deleted:
+            self.delete(item)
+        self.deleted = []
+        for typ, body, feelers in self.removed:
+            self.hide_graphics(typ, body, feelers)
+        self.removed = []
+        for entity in self.added.values():
+            self.create_graphics(entity)
+            self.dirty.pop(entity.id, None)
+        self.added = {}
+        x1, y1, x2, y2 = self.visible_region()
+        for entity_id, entity in list(self.dirty.items()):
+            x, y = entity.coords
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                self.update_graphics(entity)
+                del self.dirty[entity_id]
+        self.steps = 0
+        self.last_flush = time.perf_counter()
+        self.update_idletasks()
+
+    def visible_region(self):
+        '''Canvas coordinates of the part of the Canvas in sight, with a margin for bodies.'''
+        margin = Entity.RADIUS
+        width = self.winfo_width()
+        height = self.winfo_height()
+        if width <= 1 or height <= 1:
+            # Not laid out yet, so treat everything as visible
+            return -margin, -margin, self.world.width + margin, self.world.height + margin
+        return self.canvasx(0) - margin, self.canvasy(0) - margin, \
+               self.canvasx(width) + margin, self.canvasy(height) + margin
+
+    def hide_graphics(self, typ, body, feelers):
+        '''Hide the body and feelers of an entity of type typ that has left the world,
+        keeping them for another entity of the type, if there's room.'''
+        del self.owners[body]
+        spares = self.spares.setdefault(typ, [])
+        if len(spares) < WorldView.SPARES:
+            for item in [body] + feelers:
+                self.itemconfigure(item, state='hidden')
+            spares.append((body, feelers))
+        else:
+            for item in [body] + feelers:
+                self.delete(item)
+
+    def describe(self, body, event):
+        '''Describe the entity drawn by body, which was clicked on.'''
+        self.owners[body].describe(event)
+
+    def describe_verbosely(self, body, event):
+        '''Describe the entity drawn by body, which was double-clicked on, verbosely.'''
+        self.owners[body].describe_verbosely(event)
+
+    def create_graphics(self, entity):
+        '''Create the graphics for a new entity, or show hidden ones kept for its type.'''
+        spares = self.spares.get(type(entity))
+        if spares:
+            body, feelers = spares.pop()
+            self.bodies[entity.id] = body
+            self.owners[body] = entity
+            self.itemconfigure(body, state='normal')
+            if self.show_feelers:
+                if feelers:
+                    self.feelers[entity.id] = feelers
+                    for feeler in feelers:
+                        self.itemconfigure(feeler, state='normal')
+                else:
+                    self.create_feelers(entity, body)
+            self.update_graphics(entity)
+            return
+        x, y = entity.coords
+        if isinstance(entity, Critter):
+            body = self.create_arc(x - Entity.RADIUS, y - Entity.RADIUS,
+                                   x + Entity.RADIUS, y + Entity.RADIUS,
+                                   # A little mouth
+                                   start=entity.heading + entity.mouth_angle / 2,
+                                   extent= 360 - entity.mouth_angle,
+                                   fill=entity.color, outline=entity.outline)
+        else:
+            body = self.create_oval(x - Entity.RADIUS, y - Entity.RADIUS,
+                                    x + Entity.RADIUS, y + Entity.RADIUS,
+                                    fill = entity.color, outline = entity.outline)
+        # Through the view, since the body may be shown again for another entity
+        self.tag_bind(body, "<1>", lambda event: self.describe(body, event))
+        self.tag_bind(body, "<Double-1>", lambda event: self.describe_verbosely(body, event))
+        self.bodies[entity.id] = body
+        self.owners[body] = entity
+        if self.show_feelers:
+            self.create_feelers(entity, body)
+
+    def create_feelers(self, entity, body):
+        '''Create lines for the feelers of an entity, if it has any, under its body.'''
+        sensor = getattr(entity, 'sensor', None)
+        if isinstance(sensor, Feel):
+            feelers = []
+            for spec in sensor.feeler_specs:
+                feeler = self.create_line(*sensor.feeler_coords(*spec), fill=sensor.color)
+                self.tag_lower(feeler, body)
+                feelers.append(feeler)
+            self.feelers[entity.id] = feelers
+
+    def update_graphics(self, entity):
+        '''Move and turn the graphics for an entity to match its coordinates and heading.'''
+        x, y = entity.coords
+        body = self.bodies[entity.id]
+        self.coords(body,
+                    x - Entity.RADIUS, y - Entity.RADIUS,
+                    x + Entity.RADIUS, y + Entity.RADIUS)
+        if isinstance(entity, Critter):
+            self.itemconfigure(body, start = entity.heading + entity.mouth_angle / 2)
+        feelers = self.feelers.get(entity.id)
+        if feelers:
+            sensor = entity.sensor
+            for feeler, spec in zip(feelers, sensor.feeler_specs):
+                self.coords(feeler, *sensor.feeler_coords(*spec))
@@ -0,0 +1,496 @@
+### Split out of main.py (Q320: Spring 2012, Cognitive Science Program, Indiana University).
+###
+### The World model: a toroidal arena that owns the positions and headings
+### of its entities and answers collision queries in plain Python, using
+### a grid of cells (see spatial.py) that wraps around like the world does.
+### Since Clods never move, it also keeps a raster of where they are (see
+### occupancy.py), for bumping into them and for placing new entities.
+### It knows nothing about Tk; a renderer (see view.py) can observe it.
+### All of its randomness comes from streams derived from its seed (see rng.py).
+
+from entity import *
+from spatial import *
+from occupancy import *
+from store import *
+
+class World:
+    """The arena where everyentity happens."""
+
+    EDGE = 2
+    """Along each border leave this much free."""
+    STEPS_PER_RUN = 500
+    """Number of steps to run when the 'Run' button is pushed."""
+    POOL_SIZE = 256
+    """Most dead entities of each type kept to be made into new ones."""
+
+    ENTITIES = {# Diskoid: {'init': 30, 'min': 0, 'max': 50},
+              Ringoid: {'init': 5, 'min': 0, 'max': 50},
+              Plasmoid: {'init': 75, 'min': 75, 'max': 80}}
+
+    def __init__(self, width=450, height=450, entities=None, populate=True, seed=None):
+        """Initialize dimensions and create entities.
+        entities is a dict like ENTITIES, which is used if it isn't given.
+        If populate is False, start out empty (for restoring a checkpoint).
+        seed determines everything random in the world; if it isn't given,
+        it's drawn from the random module."""
+        self.width = width
+        self.height = height
+        self.seed = random.getrandbits(64) if seed is None else seed
+        # Number of entity streams handed out so far
+        self.streams = 0
+        # Number of entity ids handed out so far
+        self.ids = 0
+        # Streams for the world's own random choices
+        self.rng = stream(self.seed, WORLD)
+        self.array_rng = array_stream(self.seed, PLACEMENT)
+        # Observer that records statistics every step (see telemetry.py)
+        self.telemetry = None
+        # Timer for the phases of each step (see profiler.py)
+        self.profiler = None
+        # Births, spawns, deaths, matings and food eaten on the current step:
+        # dicts of counts indexed by type, indexed by event name
+        self.events = {}
+        # Initial, minimum and maximum numbers of each type of entity
+        self.populations = entities or World.ENTITIES
+        # Renderer observing the world, if any (see view.py)
+        self.view = None
+        # Columns of numeric attributes for all entities (see store.py)
+        self.store = EntityStore()
+        # Dict of entities, indexed by their ids
+        self.entities = {}
+        # Dict of entities of each type, each indexed by their ids
+        self.registry = {}
+        # Stacked networks of the learning critters, one BrainBank per species
+        self.brain_banks = {}
+        # Dead entities to be renewed rather than new ones created, a list for each type
+        self.pool = {}
+        # Grid of entities for overlap queries, with cells the size of an entity's radius
+        self.space = SpatialHash(width, height, Entity.RADIUS)
+        # Raster of the Clods, for collisions with them and free places for new entities
+        self.clods = OccupancyGrid(width, height, Entity.RADIUS)
+        if populate:
+            for entity_type, entity_count in self.populations.items():
+                for i in range(entity_count['init']):
+                    self.add_entity(entity_type)
+        # Entities to mate on a given time step
+        self.to_mate = []
+        # Number of time steps elapsed so far
+        self.steps = 0
+
+    def add_entity(self, entity_type, coords=None):
+        '''Create a entity of a given type and index, at coords if they're given.
+        A dead entity of the type is renewed if there is one in the pool.'''
+        coords = coords or self.get_entity_coords()
+        pool = self.pool.get(entity_type)
+        if pool:
+            entity = pool.pop()
+            entity.renew(coords)
+        else:
+            entity = entity_type(self, coords)
+        return self.insert_entity(entity)
+
+    def new_stream(self, rng=None):
+        '''A random number stream for a new entity, independent of all the others;
+        rng, an old stream, is reseeded to be the new one if it's given.'''
+        self.streams += 1
+        if rng is None:
+            return stream(self.seed, ENTITY, self.streams)
+        rng.seed(stream_seed(self.seed, ENTITY, self.streams))
+        return rng
+
+    def new_id(self):
+        '''An id for a new entity, different from those of all the world's other entities.'''
+        self.ids += 1
+        return self.ids - 1
+
+    def insert_entity(self, entity):
+        '''Make a newly created entity part of the world, and return it.'''
+        entity_type = type(entity)
+        self.entities[entity.id] = entity
+        self.registry.setdefault(entity_type, {})[entity.id] = entity
+        self.space.insert(entity)
+        if isinstance(entity, Clod):
+            self.clods.add(*entity.coords)
+        if isinstance(entity, Critter) and BrainBank.batchable(entity.brain):
+            bank = self.brain_banks.get(entity_type)
+            if bank is None:
+                bank = self.brain_banks[entity_type] = \
+                    BrainBank(entity.brain.n_senses, entity.brain.n_actions,
+                              rng=stream(self.seed, REPLAY, self.store.kind_of(entity_type)))
+            bank.add(entity.brain)
+        if self.view:
+            self.view.entity_added(entity)
+        return entity
+
+    def add_entities(self, entity_type, n):
+        '''Create n entities of a given type, placing them all at once.'''
+        if issubclass(entity_type, Clod):
+            # Each Clod has to be clear of the ones placed before it
+            return [self.add_entity(entity_type) for i in range(n)]
+        return [self.add_entity(entity_type, coords) for coords in self.get_entities_coords(n)]
+
+    def remove_entity(self, entity):
+        '''Take the entity out of the world.'''
+        self.note('deaths', type(entity))
+        del self.entities[entity.id]
+        del self.registry[type(entity)][entity.id]
+        self.space.remove(entity)
+        if isinstance(entity, Clod):
+            self.clods.remove(*entity.coords)
+        self.store.remove(entity)
+        brain = getattr(entity, 'brain', None)
+        if brain and brain.bank:
+            brain.bank.remove(brain)
+        if self.view:
+            self.view.entity_removed(entity)
+        entity.destroy()
+        pool = self.pool.setdefault(type(entity), [])
+        if len(pool) < World.POOL_SIZE:
+            pool.append(entity)
+
+    def move_entity(self, entity, coords):
+        '''Put the entity at coords.'''
+        if isinstance(entity, Clod):
+            self.clods.remove(*entity.coords)
+            self.clods.add(*coords)
+        entity.coords = coords
+        self.space.move(entity)
+        if self.view:
+            self.view.entity_moved(entity)
+
+    def turn_entity(self, entity, heading):
+        '''Give the entity a new heading.'''
+        entity.heading = heading
+        if self.view:
+            self.view.entity_turned(entity)
+
+    def placement_region(self):
+        '''Lowest and highest x and y coordinates (inclusive) for new entities.'''
+        return (Entity.RADIUS + World.EDGE, self.width - Entity.RADIUS - World.EDGE,
+                Entity.RADIUS + World.EDGE, self.height - Entity.RADIUS - World.EDGE)
+
+    def free_places(self):
+        '''The region for new entities, and the indices of its points clear of Clods.'''
+        region = self.placement_region()
+        free = self.clods.free_indices(Entity.RADIUS, *region)
+        if not len(free):
+            raise ValueError('no room for a new entity')
+        return region, free
+
+    def get_entity_coords(self):
+        '''Coordinates for a new entity, anywhere in the world that is clear of Clods.'''
+        (x_lo, x_hi, y_lo, y_hi), free = self.free_places()
+        x, y = self.clods.free_points(free[self.rng.randrange(len(free))], x_lo, y_lo, y_hi)
+        return int(x), int(y)
+
+    def get_entities_coords(self, n):
+        '''Coordinates for n new entities, drawn all at once from the places clear of Clods.'''
+        (x_lo, x_hi, y_lo, y_hi), free = self.free_places()
+        xs, ys = self.clods.free_points(free[self.array_rng.integers(0, len(free), n)],
+                                        x_lo, y_lo, y_hi)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def near_pairs(self, xs, ys, body_xs, body_ys, reach):
+        '''Arrays of the indices of the pairs of points xs, ys and bodies at body_xs, body_ys
+        (1-d arrays) in the same or neighboring cells of a grid of cells at least reach on a
+        side, which include all the pairs less than reach apart each way, the short way
+        around the world. The bodies are sorted by cell, so the bodies in a point's cell
+        are a range of them.'''
+        width, height = self.width, self.height
+        cols = max(1, int(width // reach))
+        rows = max(1, int(height // reach))
+        cell_width, cell_height = width / cols, height / rows
+        cells = ((body_xs % width) // cell_width).astype(np.int64) % cols * rows + \
+                ((body_ys % height) // cell_height).astype(np.int64) % rows
+        order = np.argsort(cells, kind='stable')
+        sorted_cells = cells[order]
+        point_cols = ((xs % width) // cell_width).astype(np.int64)
+        point_rows = ((ys % height) // cell_height).astype(np.int64)
+        # Each neighboring cell once, even when there are fewer than 3 cells across
+        offsets = [(dc, dr) for dc in sorted({d % cols for d in (-1, 0, 1)}) \
+                   for dr in sorted({d % rows for d in (-1, 0, 1)})]
+        dcs, drs = np.array(offsets).T
+        neighbors = ((point_cols[:, None] + dcs) % cols * rows + \
+                     (point_rows[:, None] + drs) % rows).ravel()
+        first = np.searchsorted(sorted_cells, neighbors, 'left')
+        counts = np.searchsorted(sorted_cells, neighbors, 'right') - first
+        # The bodies in each point's neighboring cells, one pair each
+        starts = np.repeat(first - np.cumsum(counts) + counts, counts)
+        points = np.repeat(np.arange(len(xs)), len(offsets))
+        return np.repeat(points, counts), order[starts + np.arange(counts.sum())]
+
+    def find_overlapping_points(self, xs, ys, half):
+        '''Arrays of the pairs of points and entities for which the entity's body overlaps
+        the square of half-size half centered on the point, as find_overlapping() finds
+        them, for all of the points xs, ys (arrays of any shape) in one pass: the indices of
+        the points (in xs.ravel()) and the store slots of the entities. Each point is only
+        tested against the bodies near it (see near_pairs()).'''
+        store = self.store
+        width, height = self.width, self.height
+        r = Entity.RADIUS
+        xs = np.ravel(xs)
+        ys = np.ravel(ys)
+        body_xs = store.x[:store.n]
+        body_ys = store.y[:store.n]
+        points, slots = self.near_pairs(xs, ys, body_xs, body_ys, half + r)
+        # The same test as find_overlapping(), the short way around the world
+        dx = (body_xs[slots] - xs[points]) % width
+        dx = np.maximum(np.minimum(dx, width - dx) - half, 0)
+        dy = (body_ys[slots] - ys[points]) % height
+        dy = np.maximum(np.minimum(dy, height - dy) - half, 0)
+        overlap = dx * dx + dy * dy <= r * r
+        return points[overlap], slots[overlap]
+
+    def find_overlapping(self, x1, y1, x2, y2, kind=None):
+        '''Entities (of type kind, if given) whose bodies overlap the rectangle x1, y1, x2, y2,
+        which may extend past the edges of the world.'''
+        r = Entity.RADIUS
+        r2 = r * r
+        width, height = self.width, self.height
+        half_width, half_height = (x2 - x1) / 2, (y2 - y1) / 2
+        mid_x, mid_y = x1 + half_width, y1 + half_height
+        found = []
+        for entity in self.space.near(x1 - r, y1 - r, x2 + r, y2 + r):
+            if kind and not isinstance(entity, kind):
+                continue
+            x, y = entity.coords
+            # Distance from the center of the body to the nearest point of the rectangle,
+            # the short way around the world
+            dx = (x - mid_x) % width
+            dx = min(dx, width - dx) - half_width
+            dy = (y - mid_y) % height
+            dy = min(dy, height - dy) - half_height
+            dx = dx if dx > 0 else 0
+            dy = dy if dy > 0 else 0
+            if dx * dx + dy * dy <= r2:
+                found.append(entity)
+        return found
+
+    def get_overlapping(self, coords, except_entity):
+        '''Entities that overlap with coordinates coords other than except_entity.'''
+        return [entity for entity in \
+                self.find_overlapping(coords[0], coords[1], coords[2], coords[3]) \
+                if entity is not except_entity]
+
+    def overlaps_with(self, x1, y1, x2, y2, kind, exclude=-1):
+        '''Does the region with coordinates x1, y1, x2, y2 overlap with any of type kind?'''
+        return some(lambda x: x.id != exclude,
+                    self.find_overlapping(x1, y1, x2, y2, kind))
+
+    def entity_overlaps_with(self, x, y, kind):
+        '''Does the Entity overlap with any of type kind?'''
+        return len(self.find_overlapping(x - Entity.RADIUS, y - Entity.RADIUS,
+                                         x + Entity.RADIUS, y + Entity.RADIUS, kind)) > 0
+
+    def get_point_overlapping(self, x, y, except_entity):
+        '''Entities that overlap with a tiny square around x,y.'''
+        return self.get_overlapping((x - 1, y - 1, x + 1, y + 1), except_entity)
+
+    def overlapping_entity(self, entity, kind):
+        '''First Entity of type kind that overlaps with entity.'''
+        x, y = entity.coords
+        for entity2 in self.find_overlapping(x - Entity.RADIUS, y - Entity.RADIUS,
+                                             x + Entity.RADIUS, y + Entity.RADIUS, kind):
+            if entity2 is not entity:
+                return entity2
+
+    def adjust_coords(self, x, y):
+        '''Adjust coordinates of moved Critter assuming the world wraps around.'''
+        if x < 0:
+            x = self.width + x
+        elif x > self.width:
+            x = x - self.width
+        if y < 0:
+            y = self.height + y
+        elif y > self.height:
+            y = y - self.height
+        return x, y
+
+    def note(self, event, typ, n=1):
+        '''Count n events of a kind (like 'births') for type typ on this step.'''
+        counts = self.events.setdefault(event, {})
+        counts[typ] = counts.get(typ, 0) + n
+
+    def n_entities(self, typ):
+        '''Number of entities in the world of a given type.'''
+        return self.store.count(typ)
+
+    def step(self, event=None):
+        """Step each of the entities and update the number of entities if necessary."""
+        self.events = {}
+        profiler = self.profiler
+        if profiler:
+            profiler.mark('topup')
+        # Create new entities if necessary
+        for entity_type, entity_count in self.populations.items():
+            mn = entity_count['min']
+            n = self.n_entities(entity_type)
+            if n < mn:
+                self.note('spawns', entity_type, mn - n)
+                self.add_entities(entity_type, mn - n)
+        # Now do the actual stepping, with every critter sensing before any of them acts,
+        # and all the learning critters deciding and then learning together
+        if profiler:
+            profiler.mark('sense')
+        states = self.sense()
+        if profiler:
+            profiler.mark('decide')
+        actions = {}
+        for bank in self.brain_banks.values():
+            actions.update(bank.decide(states))
+        if profiler:
+            profiler.mark('act')
+            profiler.count('entity_steps', len(self.entities))
+        reinforcements = {}
+        for entity in self.entities.values():
+            if entity.id in actions:
+                reinforcements[entity.id] = entity.step(states[entity.id], actions[entity.id])
+            else:
+                entity.step(states.get(entity.id))
+        if profiler:
+            profiler.mark('learn')
+        for bank in self.brain_banks.values():
+            bank.learn(actions, reinforcements)
+        if profiler:
+            profiler.mark('sweep')
+        # Age everyone and kill off the entities that are supposed to die
+        for entity in self.store.sweep():
+            self.remove_entity(entity)
+        if profiler:
+            profiler.mark('mate')
+        # Mate the pairs selected to mate
+        self.to_mate = self.find_mates()
+        self.reproduce(self.to_mate)
+        self.to_mate = []
+        # Mating costs strength
+        self.store.clamp_strength()
+        self.steps += 1
+        if self.telemetry:
+            if profiler:
+                profiler.mark('telemetry')
+            self.telemetry.world_stepped()
+        if self.view:
+            if profiler:
+                profiler.mark('view')
+            self.view.world_stepped()
+        if profiler:
+            profiler.mark(None)
+
+    def sense(self):
+        '''Sense for all the critters at once, a species at a time.
+        Returns a dict of states indexed by entity id (rows of the arrays sense_group()
+        returns, for sensors that sense in bulk).'''
+        states = {}
+        for typ, members in self.registry.items():
+            if issubclass(typ, Critter) and members:
+                critters = list(members.values())
+                for critter, state in zip(critters, critters[0].sensor.sense_group(critters)):
+                    states[critter.id] = state
+        return states
+
+    def overlapping_pairs(self, xs, ys):
+        '''Arrays of the indices i < j of the pairs of entities at xs, ys (arrays) whose
+        bodies overlap as overlapping_entity() finds them: the body of one touches the
+        square around the other. Only the entities near each other are compared (see
+        near_pairs()), and the pairs come sorted by i, then j.'''
+        r = Entity.RADIUS
+        # Overlapping bodies are at most 2r apart each way
+        firsts, seconds = self.near_pairs(xs, ys, xs, ys, 2 * r)
+        # Each pair once
+        once = firsts < seconds
+        firsts, seconds = firsts[once], seconds[once]
+        # Distances past the edges of the squares, the short way around the world
+        dx = np.maximum(wrapped_diffs(xs[firsts] - xs[seconds], self.width) - r, 0)
+        dy = np.maximum(wrapped_diffs(ys[firsts] - ys[seconds], self.height) - r, 0)
+        overlap = dx * dx + dy * dy <= r * r
+        firsts, seconds = firsts[overlap], seconds[overlap]
+        order = np.lexsort((seconds, firsts))
+        return firsts[order], seconds[order]
+
+    def find_mates(self):
+        '''Pairs of overlapping critters of the same species with genetic brains, each pair
+        chosen to mate with probability mate_prob(), found in one pass over each species.
+        The chance for each pair is drawn from its lower-numbered critter's stream, so which
+        pairs mate doesn't depend on the order the critters are visited in.'''
+        pairs = []
+        store = self.store
+        for typ, members in self.registry.items():
+            if not issubclass(typ, Critter) or len(members) < 2:
+                continue
+            critters = sorted((c for c in members.values() if c.brain.genetic),
+                              key=lambda critter: critter.id)
+            if len(critters) < 2:
+                continue
+            slots = [critter.slot for critter in critters]
+            firsts, seconds = self.overlapping_pairs(store.x[slots], store.y[slots])
+            for i, j in zip(firsts.tolist(), seconds.tolist()):
+                critter1, critter2 = critters[i], critters[j]
+                if critter1.rng.random() < critter1.mate_prob(critter2):
+                    pairs.append((critter1, critter2))
+        return pairs
+
+    def reproduce(self, pairs):
+        '''Have each pair of parents produce two offspring, a species at a time, without
+        going over the species' max: the offspring are placed in one pass and their
+        genomes made all at once (see Genome.crossover_all()).'''
+        species = {}
+        # Which pairs mate when there's only room for some doesn't depend on the order
+        # the critters stepped in
+        for parent1, parent2 in sorted(pairs, key=lambda pair: (pair[0].id, pair[1].id)):
+            species.setdefault(type(parent1), []).append((parent1, parent2))
+        for typ, typ_pairs in species.items():
+            typ_max = self.populations[typ].get('max')
+            if not typ_max:
+                continue
+            # Only allow as many pairs to mate as there's room for under the max
+            typ_pairs = typ_pairs[:max(0, (typ_max - self.n_entities(typ)) // 2)]
+            if not typ_pairs:
+                continue
+            offspring = self.add_entities(typ, 2 * len(typ_pairs))
+            self.note('matings', typ, len(typ_pairs))
+            self.note('births', typ, len(offspring))
+            for parent1, parent2 in typ_pairs:
+                parent1.mate()
+                parent2.mate()
+            parents1 = [parent1 for parent1, parent2 in typ_pairs]
+            parents2 = [parent2 for parent1, parent2 in typ_pairs]
+            if parents1[0].genome and parents2[0].genome:
+                Genome.crossover_all([parent.genome for parent in parents1],
+                                     [parent.genome for parent in parents2],
+                                     offspring[0::2], offspring[1::2])
+
+    def run(self, steps=None):
+        """Run step() 'steps' times on every entity, and print the statistics."""
+        for s in range(steps or World.STEPS_PER_RUN):
+            self.step()
+        self.show_stats()
+
+    def get_stats(self):
+        '''Useful statistics about the types in the population of orgs, as a dict
+        of dicts with keys 'n', 'mean_strength' and 'max_strength', indexed by type name.'''
+        stats = {}
+        for t_type, t in self.populations.items():
+            if issubclass(t_type, Org):
+                n, strength_sum, max_s = self.store.census(t_type)
+                stats[t_type.__name__] = {'n': n,
+                                          'mean_strength': strength_sum / n if n else 0.0,
+                                          'max_strength': max_s}
+        return stats
+
+    def show_stats(self):
+        '''Print useful statistics about the types in the population of orgs.'''
+        print('POPULATION AFTER', self.steps, 'STEPS')
+        for name, t in self.get_stats().items():
+            if t['n'] != 0:
+                print(name + ':  N', t['n'], ' mean strength',
+                      int(t['mean_strength']), ' max strength', t['max_strength'])
+        if self.profiler:
+            self.profiler.show()
+        # Uncomment the following if you want to show all the genomes
+#        for t in self.entities.values():
+#            if t.genome:
+#                t.genome.show()
+
+if __name__ == '__main__':
+    # Run headless, without a display
+    World().run()